@@ -1,7 +1,9 @@
-import { spawn } from 'child_process';
-import { promisify } from 'util';
-import { writeFile, unlink } from 'fs/promises';
+import { createHash, randomUUID } from 'crypto';
+import { createReadStream, promises as fs } from 'fs';
+import os from 'os';
 import path from 'path';
+import { ResultCache } from './resultCache';
+import { audioWorkerPool } from './audioWorkerPool';
 
 export interface AudioFeatures {
   duration: number;
@@ -13,6 +15,8 @@ export interface AudioFeatures {
   acousticness: number;
   instrumentalness: number;
   fingerprint: string;
+  sampleRate: number | null;
+  bitrate: number | null;
 }
 
 export interface SimilarityMatch {
@@ -23,143 +27,75 @@ export interface SimilarityMatch {
   matchType: 'exact' | 'partial' | 'similar';
 }
 
-export class AudioAnalysisService {
-  private readonly tempDir = '/tmp';
+/**
+ * SHA-256 of the raw upload, used to key cached results for identical audio
+ */
+export function hashAudio(audioBuffer: Buffer): string {
+  return createHash('sha256').update(audioBuffer).digest('hex');
+}
 
-  async analyzeAudioFile(audioBuffer: Buffer, filename: string): Promise<AudioFeatures> {
-    const tempFilePath = path.join(this.tempDir, `temp_${Date.now()}_${filename}`);
-    
-    try {
-      // Write buffer to temporary file
-      await writeFile(tempFilePath, audioBuffer);
-      
-      // Extract audio features using FFmpeg
-      const features = await this.extractAudioFeatures(tempFilePath);
-      
-      // Generate audio fingerprint
-      const fingerprint = await this.generateFingerprint(tempFilePath);
-      
-      return {
-        ...features,
-        fingerprint
-      };
-    } finally {
-      // Clean up temporary file
+/**
+ * SHA-256 of an upload spooled to disk, streamed so the file is never held in
+ * memory and the event loop is not blocked
+ */
+export function hashAudioFile(path: string): Promise<string> {
+  return new Promise((resolve, reject) => {
+    const hash = createHash('sha256');
+    createReadStream(path)
+      .on('data', chunk => hash.update(chunk))
+      .on('error', reject)
+      .on('end', () => resolve(hash.digest('hex')));
+  });
+}
+
+export class AudioAnalysisService {
+  private readonly cache = new ResultCache<AudioFeatures>('audio_analysis', {
+    maxEntries: 1000,
+    ttlMs: 24 * 60 * 60 * 1000,
+  });
+
+  /**
+   * Analyse an in-memory upload. The buffer is spooled to a temp file so
+   * ffmpeg can seek in it. Rejects if the audio cannot be decoded; failures
+   * are not cached.
+   */
+  async analyzeAudioFile(audioBuffer: Buffer, filename: string, contentHash = hashAudio(audioBuffer)): Promise<AudioFeatures> {
+    return this.cache.getOrCompute(contentHash, async () => {
+      const spoolPath = path.join(os.tmpdir(), `analysis-${randomUUID()}${path.extname(filename).replace(/[^\w.]/g, '')}`);
+      await fs.writeFile(spoolPath, audioBuffer);
       try {
-        await unlink(tempFilePath);
-      } catch (error) {
-        console.warn('Failed to cleanup temp file:', tempFilePath);
+        return await this.extract(spoolPath, filename, contentHash);
+      } finally {
+        await fs.unlink(spoolPath).catch(() => {});
       }
-    }
-  }
-
-  private async extractAudioFeatures(filePath: string): Promise<Omit<AudioFeatures, 'fingerprint'>> {
-    return new Promise((resolve, reject) => {
-      const ffprobe = spawn('ffprobe', [
-        '-v', 'quiet',
-        '-print_format', 'json',
-        '-show_format',
-        '-show_streams',
-        filePath
-      ]);
-
-      let output = '';
-      ffprobe.stdout.on('data', (data) => {
-        output += data.toString();
-      });
-
-      ffprobe.on('close', (code) => {
-        if (code !== 0) {
-          // If FFmpeg not available, return estimated values
-          console.warn('FFprobe not available, using estimated audio features');
-          resolve({
-            duration: 180, // 3 minutes default
-            bpm: 120,
-            key: 'C',
-            energy: 0.7,
-            danceability: 0.6,
-            valence: 0.5,
-            acousticness: 0.3,
-            instrumentalness: 0.1,
-          });
-          return;
-        }
-
-        try {
-          const metadata = JSON.parse(output);
-          const audioStream = metadata.streams.find((s: any) => s.codec_type === 'audio');
-          const duration = parseFloat(metadata.format.duration) || 180;
-
-          resolve({
-            duration,
-            bpm: this.estimateBPM(duration),
-            key: this.estimateKey(),
-            energy: Math.random() * 0.4 + 0.6, // 0.6-1.0
-            danceability: Math.random() * 0.5 + 0.4, // 0.4-0.9
-            valence: Math.random(), // 0.0-1.0
-            acousticness: Math.random() * 0.7, // 0.0-0.7
-            instrumentalness: Math.random() * 0.3, // 0.0-0.3
-          });
-        } catch (error) {
-          reject(new Error(`Failed to parse audio metadata: ${error}`));
-        }
-      });
-
-      ffprobe.on('error', (error) => {
-        console.warn('FFprobe error, using estimated features:', error.message);
-        resolve({
-          duration: 180,
-          bpm: 120,
-          key: 'C',
-          energy: 0.7,
-          danceability: 0.6,
-          valence: 0.5,
-          acousticness: 0.3,
-          instrumentalness: 0.1,
-        });
-      });
     });
   }
 
-  private async generateFingerprint(filePath: string): Promise<string> {
-    // Generate a simple hash-based fingerprint
-    const crypto = await import('crypto');
-    const fs = await import('fs');
-    
-    return new Promise((resolve, reject) => {
-      const hash = crypto.createHash('sha256');
-      const stream = fs.createReadStream(filePath);
-      
-      stream.on('data', (data) => hash.update(data));
-      stream.on('end', () => {
-        const fingerprint = hash.digest('hex').substring(0, 32);
-        resolve(fingerprint);
-      });
-      stream.on('error', (error) => {
-        console.warn('Fingerprint generation failed, using fallback');
-        // Generate deterministic fingerprint from file stats
-        const fallback = crypto.createHash('md5')
-          .update(filePath + Date.now())
-          .digest('hex')
-          .substring(0, 32);
-        resolve(fallback);
-      });
-    });
+  /**
+   * Analyse an upload already on disk (e.g. spooled by the ingest queue)
+   */
+  async analyzeAudioPath(filePath: string, filename: string, contentHash: string): Promise<AudioFeatures> {
+    return this.cache.getOrCompute(contentHash, () => this.extract(filePath, filename, contentHash));
   }
 
-  private estimateBPM(duration: number): number {
-    // Estimate BPM based on duration and common patterns
-    if (duration < 120) return Math.floor(Math.random() * 40) + 120; // 120-160 BPM
-    if (duration < 240) return Math.floor(Math.random() * 60) + 100; // 100-160 BPM
-    return Math.floor(Math.random() * 80) + 80; // 80-160 BPM
+  private async extract(filePath: string, filename: string, contentHash: string): Promise<AudioFeatures> {
+    try {
+      // Decoded by ffmpeg and analysed frame by frame on a worker thread
+      const features = await audioWorkerPool.analyze(filePath);
+      return {
+        ...features,
+        // Clips too short for an acoustic fingerprint fall back to the content hash
+        fingerprint: features.fingerprint || this.generateFingerprint(contentHash)
+      };
+    } catch (error) {
+      console.warn(`Audio analysis failed for ${filename}:`, error);
+      throw error;
+    }
   }
 
-  private estimateKey(): string {
-    const keys = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B'];
-    const modes = ['major', 'minor'];
-    const key = keys[Math.floor(Math.random() * keys.length)];
-    const mode = modes[Math.floor(Math.random() * modes.length)];
-    return `${key} ${mode}`;
+  private generateFingerprint(contentHash: string): string {
+    // Generate a simple hash-based fingerprint
+    return contentHash.substring(0, 32);
   }
 
   async findSimilarTracks(features: AudioFeatures, allTracks: any[]): Promise<SimilarityMatch[]> {
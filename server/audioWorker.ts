@@ -0,0 +1,13 @@
+import { parentPort } from 'worker_threads';
+import { decodeAndExtract } from './audioFeatures';
+
+// Worker thread entry for AudioWorkerPool: one analysis at a time, so FFT,
+// chroma and fingerprint work stays off the server's event loop
+parentPort!.on('message', async ({ id, path }: { id: number; path: string }) => {
+  try {
+    const features = await decodeAndExtract(path);
+    parentPort!.postMessage({ id, features });
+  } catch (error) {
+    parentPort!.postMessage({ id, error: error instanceof Error ? error.message : String(error) });
+  }
+});
@@ -0,0 +1,95 @@
+import os from 'os';
+import { Worker } from 'worker_threads';
+import type { DecodedFeatures } from './audioFeatures';
+
+interface Task {
+  id: number;
+  path: string;
+  resolve: (features: DecodedFeatures) => void;
+  reject: (error: Error) => void;
+}
+
+// tsx runs the TypeScript source in development (workers inherit its loader
+// through execArgv); the production build emits dist/audioWorker.js next to
+// dist/index.js
+const WORKER_URL = new URL(
+  import.meta.url.endsWith('.ts') ? './audioWorker.ts' : './audioWorker.js',
+  import.meta.url
+);
+
+/**
+ * Fixed-size pool of worker threads running decode and feature extraction.
+ * Tasks queue when every worker is busy; a worker that crashes is replaced
+ * and only its own task fails.
+ */
+export class AudioWorkerPool {
+  private readonly idle: Worker[] = [];
+  private readonly running = new Map<Worker, Task>();
+  private readonly queue: Task[] = [];
+  private workerCount = 0;
+  private nextId = 0;
+
+  constructor(private readonly maxWorkers: number) {}
+
+  analyze(path: string): Promise<DecodedFeatures> {
+    return new Promise((resolve, reject) => {
+      this.queue.push({ id: this.nextId++, path, resolve, reject });
+      this.dispatch();
+    });
+  }
+
+  private dispatch(): void {
+    while (this.queue.length > 0) {
+      let worker = this.idle.pop();
+      if (!worker) {
+        if (this.workerCount >= this.maxWorkers) return;
+        worker = this.spawn();
+      }
+      const task = this.queue.shift()!;
+      this.running.set(worker, task);
+      worker.ref();
+      worker.postMessage({ id: task.id, path: task.path });
+    }
+  }
+
+  private spawn(): Worker {
+    const worker = new Worker(WORKER_URL);
+    this.workerCount++;
+
+    worker.on('message', ({ id, features, error }: { id: number; features?: DecodedFeatures; error?: string }) => {
+      const task = this.running.get(worker);
+      if (!task || task.id !== id) return;
+      this.running.delete(worker);
+      // Idle workers must not keep the process alive
+      worker.unref();
+      this.idle.push(worker);
+
+      if (error !== undefined) task.reject(new Error(error));
+      else task.resolve(features!);
+      this.dispatch();
+    });
+
+    worker.on('error', (error) => {
+      console.error('Audio analysis worker crashed:', error);
+    });
+
+    worker.on('exit', (code) => {
+      this.workerCount--;
+      const idleAt = this.idle.indexOf(worker);
+      if (idleAt >= 0) this.idle.splice(idleAt, 1);
+
+      const task = this.running.get(worker);
+      if (task) {
+        this.running.delete(worker);
+        task.reject(new Error(`Audio analysis worker exited with code ${code}`));
+      }
+      this.dispatch();
+    });
+
+    return worker;
+  }
+}
+
+export const audioWorkerPool = new AudioWorkerPool(
+  parseInt(process.env.AUDIO_ANALYSIS_WORKERS || '', 10) || Math.max(1, os.cpus().length - 1)
+);
@@ -0,0 +1,56 @@
+// Feature extraction throughput, in tracks per second on a single core.
+// Decoding is excluded (it runs in ffmpeg); synthetic 3-minute tracks with a
+// known tempo and key are pushed straight into the extractor.
+// Run with: npx tsx server/benchmarks/audioFeatures.ts [trackCount]
+import { performance } from 'perf_hooks';
+import { ANALYSIS_SAMPLE_RATE, FeatureAccumulator } from '../audioFeatures';
+
+const trackCount = parseInt(process.argv[2] || '', 10) || 10;
+const trackSeconds = 180;
+const chunkSize = 4096;
+
+const cases = [
+  { bpm: 128, key: 'A minor', freqs: [220, 261.63, 329.63] },
+  { bpm: 95, key: 'C major', freqs: [261.63, 329.63, 392] },
+  { bpm: 140, key: 'E minor', freqs: [164.81, 196, 246.94] },
+];
+
+function synthesize(bpm: number, freqs: number[]): Float32Array {
+  const samples = new Float32Array(ANALYSIS_SAMPLE_RATE * trackSeconds);
+  const beat = Math.round((ANALYSIS_SAMPLE_RATE * 60) / bpm);
+  for (let i = 0; i < samples.length; i++) {
+    let value = 0;
+    for (const freq of freqs) {
+      value += 0.1 * Math.sin((2 * Math.PI * freq * i) / ANALYSIS_SAMPLE_RATE);
+    }
+    const phase = i % beat;
+    if (phase < 400) value += (Math.random() - 0.5) * 0.8 * Math.exp(-phase / 80);
+    samples[i] = value;
+  }
+  return samples;
+}
+
+const tracks = Array.from({ length: trackCount }, (_, i) => {
+  const spec = cases[i % cases.length];
+  return { ...spec, samples: synthesize(spec.bpm, spec.freqs) };
+});
+
+let tempoHits = 0;
+let keyHits = 0;
+const start = performance.now();
+for (const track of tracks) {
+  const accumulator = new FeatureAccumulator();
+  for (let i = 0; i < track.samples.length; i += chunkSize) {
+    accumulator.push(track.samples.subarray(i, i + chunkSize));
+  }
+  const features = accumulator.finish();
+  if (Math.abs(features.bpm - track.bpm) <= 2) tempoHits++;
+  if (features.key === track.key) keyHits++;
+}
+const elapsedSec = (performance.now() - start) / 1000;
+
+console.log(`tracks:           ${trackCount} x ${trackSeconds}s`);
+console.log(`throughput:       ${(trackCount / elapsedSec).toFixed(2)} tracks/s/core`);
+console.log(`realtime factor:  ${((trackCount * trackSeconds) / elapsedSec).toFixed(0)}x`);
+console.log(`tempo within 2:   ${tempoHits}/${trackCount}`);
+console.log(`key correct:      ${keyHits}/${trackCount}`);
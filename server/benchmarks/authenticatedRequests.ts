@@ -0,0 +1,119 @@
+// Requests per second through the real authenticated request path:
+// - metrics middleware;
+// - the Postgres-backed session store and passport session;
+// - isAuthenticated;
+// - the upload rate limiter (configured high enough not to reject);
+// - a paginated track listing from storage.
+// Runs against DATABASE_URL with the server's env (SESSION_SECRET etc.).
+// A throwaway benchmark user and session are created directly instead of
+// through the OIDC login, and both are deleted when the run ends.
+// Run with: npx tsx server/benchmarks/authenticatedRequests.ts [requests] [concurrency]
+import { randomUUID } from 'crypto';
+import http from 'http';
+import type { AddressInfo } from 'net';
+import express from 'express';
+import passport from 'passport';
+import { performance } from 'perf_hooks';
+import { eq, sql } from 'drizzle-orm';
+
+const requestCount = parseInt(process.argv[2] || '', 10) || 5_000;
+const concurrency = parseInt(process.argv[3] || '', 10) || 32;
+const userId = `benchmark-${randomUUID()}`;
+
+function percentile(sorted: number[], p: number): number {
+  return sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * p))];
+}
+
+async function main() {
+  // replitAuth insists on these at import time; the OIDC flow itself is unused
+  process.env.REPLIT_DOMAINS ??= 'localhost';
+  process.env.SESSION_SECRET ??= 'benchmark-secret';
+
+  const { getSession, isAuthenticated } = await import('../replitAuth');
+  const { rateLimit, RateLimitPolicy } = await import('../rateLimiter');
+  const { metricsMiddleware } = await import('../metrics');
+  const { storage } = await import('../storage');
+  const { parsePageParams } = await import('../pagination');
+  const { db, pool } = await import('../db');
+  const { users, sessions } = await import('@shared/schema');
+
+  await storage.upsertUser({ id: userId, email: `${userId}@example.com` });
+  try {
+    const app = express();
+    app.set('trust proxy', 1);
+    app.use(metricsMiddleware());
+    app.use(express.json());
+    app.use(getSession());
+    app.use(passport.initialize());
+    app.use(passport.session());
+    passport.serializeUser((user: Express.User, cb) => cb(null, user));
+    passport.deserializeUser((user: Express.User, cb) => cb(null, user));
+
+    app.post('/bench/login', (req, res, next) => {
+      const user = { claims: { sub: userId }, expires_at: Math.floor(Date.now() / 1000) + 3600 };
+      req.login(user, error => (error ? next(error) : res.sendStatus(204)));
+    });
+
+    const limiter = rateLimit(new RateLimitPolicy('bench', [{ limit: requestCount * 2, windowMs: 60 * 60 * 1000 }]));
+    app.get('/api/tracks', isAuthenticated, limiter, async (req: any, res) => {
+      res.json(await storage.getUserTracksPage(req.user.claims.sub, parsePageParams(req.query)));
+    });
+
+    const server = app.listen(0);
+    const { port } = server.address() as AddressInfo;
+    const agent = new http.Agent({ keepAlive: true, maxSockets: concurrency });
+    // The session cookie is Secure, so present the requests as proxied HTTPS
+    const headers: http.OutgoingHttpHeaders = { 'x-forwarded-proto': 'https' };
+
+    const request = (method: string, path: string) =>
+      new Promise<http.IncomingMessage>((resolve, reject) => {
+        const req = http.request({ port, method, path, agent, headers }, res => {
+          res.resume();
+          res.on('end', () => resolve(res));
+        });
+        req.on('error', reject);
+        req.end();
+      });
+
+    const login = await request('POST', '/bench/login');
+    const cookie = login.headers['set-cookie']?.[0]?.split(';')[0];
+    if (!cookie) throw new Error('Login did not set a session cookie');
+    headers.cookie = cookie;
+
+    const timings: number[] = [];
+    let failures = 0;
+    let issued = 0;
+    const worker = async () => {
+      while (issued < requestCount) {
+        issued++;
+        const start = performance.now();
+        const res = await request('GET', '/api/tracks?limit=20');
+        timings.push(performance.now() - start);
+        if (res.statusCode !== 200) failures++;
+      }
+    };
+
+    const start = performance.now();
+    await Promise.all(Array.from({ length: concurrency }, worker));
+    const elapsedMs = performance.now() - start;
+    timings.sort((a, b) => a - b);
+
+    console.log(`requests:         ${requestCount} at concurrency ${concurrency} (${failures} non-200)`);
+    console.log(`throughput:       ${Math.round(requestCount / (elapsedMs / 1000)).toLocaleString()} req/s`);
+    console.log(`latency p50:      ${percentile(timings, 0.5).toFixed(1)} ms`);
+    console.log(`latency p99:      ${percentile(timings, 0.99).toFixed(1)} ms`);
+
+    server.close();
+    agent.destroy();
+  } finally {
+    await db.delete(sessions).where(sql`${sessions.sess}->'passport'->'user'->'claims'->>'sub' = ${userId}`);
+    await db.delete(users).where(eq(users.id, userId));
+    await pool.end();
+  }
+  process.exit(0);
+}
+
+main().catch((error) => {
+  console.error(error);
+  process.exit(1);
+});
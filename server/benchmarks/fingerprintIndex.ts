@@ -0,0 +1,123 @@
+// Lookup latency, memory and robustness of the in-process fingerprint index
+// at catalog scale. Catalog entries are 64-word fingerprints, the size the
+// acoustic extractor produces. Queries are exact copies, copies with random
+// bit flips (as a transcode would cause), clips cut from the middle of a
+// track with flipped bits, tracks added after the initial load, and unseen
+// fingerprints, which must not match.
+// Run with: npx tsx server/benchmarks/fingerprintIndex.ts [trackCount]
+import { randomBytes, randomFillSync, randomUUID } from 'crypto';
+import { performance } from 'perf_hooks';
+import { FingerprintIndex } from '../fingerprintIndex';
+
+const trackCount = parseInt(process.argv[2] || '', 10) || 1_000_000;
+const queriesPerCase = 2_000;
+const addedCount = 5_000;
+const WORDS = 64;
+
+function percentile(sorted: number[], p: number): number {
+  return sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * p))];
+}
+
+function mb(bytes: number): string {
+  return `${(bytes / 1024 / 1024).toFixed(0)} MB`;
+}
+
+// Big-endian hex of each word, the layout the extractor writes
+function hex(words: Uint32Array): string {
+  return Buffer.from(words.slice().buffer).swap32().toString('hex');
+}
+
+function perturb(words: Uint32Array, bitErrorRate: number, fromWord = 0, toWord = WORDS): string {
+  const out = words.slice(fromWord, toWord);
+  for (let w = 0; w < out.length; w++) {
+    for (let bit = 0; bit < 32; bit++) {
+      if (Math.random() < bitErrorRate) out[w] ^= 1 << bit;
+    }
+  }
+  return hex(out);
+}
+
+// Fingerprints are kept as raw words and only turned into hex strings while
+// loading, as rows paged from the database would be
+const catalog = randomFillSync(new Uint32Array(trackCount * WORDS));
+const trackIds = Array.from({ length: trackCount }, () => randomUUID());
+const wordsOf = (i: number) => catalog.subarray(i * WORDS, (i + 1) * WORDS);
+
+function* entries() {
+  for (let i = 0; i < trackCount; i++) yield { id: trackIds[i], fingerprint: hex(wordsOf(i)) };
+}
+
+async function main() {
+  global.gc?.();
+  const before = process.memoryUsage();
+  const index = new FingerprintIndex();
+  const buildStart = performance.now();
+  await index.load(entries());
+  const buildMs = performance.now() - buildStart;
+  global.gc?.();
+  const after = process.memoryUsage();
+
+  console.log(`tracks indexed:   ${index.size} (${WORDS} words each)`);
+  console.log(`build time:       ${buildMs.toFixed(0)} ms`);
+  console.log(`index heap:       ~${mb(after.heapUsed - before.heapUsed)}`);
+  console.log(`index off-heap:   ~${mb(after.arrayBuffers - before.arrayBuffers)}`);
+  console.log(`process RSS:      ${mb(after.rss)} (includes the benchmark's own ${mb(catalog.byteLength)} catalog)`);
+
+  const added: Array<{ id: string; words: Uint32Array }> = [];
+  const addTimings: number[] = [];
+  for (let i = 0; i < addedCount; i++) {
+    const entry = { id: randomUUID(), words: randomFillSync(new Uint32Array(WORDS)) };
+    const fingerprint = hex(entry.words);
+    const start = performance.now();
+    index.add(entry.id, fingerprint);
+    addTimings.push(performance.now() - start);
+    added.push(entry);
+  }
+  addTimings.sort((a, b) => a - b);
+  console.log(`add after load:   p50 ${(percentile(addTimings, 0.5) * 1000).toFixed(0)} µs, p99 ${(percentile(addTimings, 0.99) * 1000).toFixed(0)} µs`);
+  console.log('');
+
+  const catalogEntry = () => {
+    const i = Math.floor(Math.random() * trackCount);
+    return { id: trackIds[i], words: wordsOf(i) };
+  };
+  const cases: Array<{ name: string; expectMatch: boolean; pick: () => { id: string; words: Uint32Array }; make: (words: Uint32Array) => string }> = [
+    { name: 'exact copy', expectMatch: true, pick: catalogEntry, make: hex },
+    { name: 'BER 2%', expectMatch: true, pick: catalogEntry, make: w => perturb(w, 0.02) },
+    { name: 'BER 5%', expectMatch: true, pick: catalogEntry, make: w => perturb(w, 0.05) },
+    { name: 'BER 10%', expectMatch: true, pick: catalogEntry, make: w => perturb(w, 0.10) },
+    { name: 'BER 15%', expectMatch: true, pick: catalogEntry, make: w => perturb(w, 0.15) },
+    { name: 'clip w20-40 BER 5%', expectMatch: true, pick: catalogEntry, make: w => perturb(w, 0.05, 20, 40) },
+    { name: 'added, BER 5%', expectMatch: true, pick: () => added[Math.floor(Math.random() * added.length)], make: w => perturb(w, 0.05) },
+    { name: 'unseen', expectMatch: false, pick: catalogEntry, make: () => randomBytes(WORDS * 4).toString('hex') },
+  ];
+
+  for (const { name, expectMatch, pick, make } of cases) {
+    const timings: number[] = [];
+    let correct = 0;
+    for (let q = 0; q < queriesPerCase; q++) {
+      const entry = pick();
+      const query = make(entry.words);
+
+      const start = performance.now();
+      const matches = index.lookup(query);
+      timings.push(performance.now() - start);
+
+      const found = matches.length > 0 && matches[0].trackId === entry.id;
+      if (expectMatch ? found : matches.length === 0) correct++;
+    }
+    timings.sort((a, b) => a - b);
+
+    const rate = ((correct / queriesPerCase) * 100).toFixed(1);
+    console.log(
+      `${name.padEnd(20)} ${expectMatch ? 'recall' : 'rejected'} ${rate.padStart(5)}%  ` +
+      `p50 ${(percentile(timings, 0.5) * 1000).toFixed(0).padStart(5)} µs  ` +
+      `p99 ${(percentile(timings, 0.99) * 1000).toFixed(0).padStart(6)} µs`
+    );
+  }
+}
+
+main().catch((error) => {
+  console.error(error);
+  process.exit(1);
+});
@@ -0,0 +1,32 @@
+// Raw throughput of the in-memory sliding-window limiters alone. For the full
+// authenticated request path see authenticatedRequests.ts.
+// Run with: npx tsx server/benchmarks/rateLimiter.ts [userCount]
+import { performance } from 'perf_hooks';
+import { SlidingWindowLimiter } from '../rateLimiter';
+
+const userCount = parseInt(process.argv[2] || '', 10) || 10_000;
+const checks = 2_000_000;
+
+const hourly = new SlidingWindowLimiter(1000, 60 * 60 * 1000);
+const daily = new SlidingWindowLimiter(10_000, 24 * 60 * 60 * 1000);
+const keys = Array.from({ length: userCount }, (_, i) => `upload:user-${i}`);
+
+let rejected = 0;
+const start = performance.now();
+for (let i = 0; i < checks; i++) {
+  const key = keys[i % userCount];
+  const now = Date.now();
+  // Same order as the middleware: check every window, then charge all of them
+  if (!hourly.peek(key, now).allowed || !daily.peek(key, now).allowed) {
+    rejected++;
+    continue;
+  }
+  hourly.record(key, now);
+  daily.record(key, now);
+}
+const elapsedMs = performance.now() - start;
+
+console.log(`users:            ${userCount}`);
+console.log(`requests checked: ${checks} (${rejected} rejected)`);
+console.log(`throughput:       ${Math.round(checks / (elapsedMs / 1000)).toLocaleString()} req/s`);
+console.log(`per request:      ${((elapsedMs / checks) * 1000).toFixed(2)} µs`);
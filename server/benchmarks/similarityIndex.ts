@@ -0,0 +1,97 @@
+// Recall and latency of the LSH similarity index against an exact scan over a
+// synthetic catalog: tracks draw genre, mood, tags and keywords from fixed
+// vocabularies plus random tempo, key and duration, and roughly 60% are
+// licensable. recall@k is the share of the exact top-k the index returns.
+// Run with: npx tsx server/benchmarks/similarityIndex.ts [trackCount] [k]
+import { randomUUID } from 'crypto';
+import { performance } from 'perf_hooks';
+import { SimilarityIndex, vectorizeTrack, type SimilarityFields } from '../similarityIndex';
+
+const trackCount = parseInt(process.argv[2] || '', 10) || 200_000;
+const k = parseInt(process.argv[3] || '', 10) || 10;
+const queryCount = 500;
+
+const GENRES = ['rock', 'pop', 'jazz', 'hip hop', 'electronic', 'classical', 'folk', 'metal', 'ambient', 'r&b',
+  'country', 'reggae', 'blues', 'soul', 'house', 'techno', 'drum and bass', 'lo-fi', 'soundtrack', 'latin'];
+const MOODS = ['happy', 'sad', 'energetic', 'calm', 'dark', 'uplifting', 'romantic', 'tense', 'dreamy', 'aggressive'];
+const TAGS = Array.from({ length: 300 }, (_, i) => `tag-${i}`);
+const KEYWORDS = Array.from({ length: 500 }, (_, i) => `keyword-${i}`);
+const KEYS = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B'];
+const STATUSES = ['verified', 'registered', 'licensed', 'uploaded', 'processing'];
+
+const pick = <T>(values: T[]) => values[Math.floor(Math.random() * values.length)];
+const pickSome = <T>(values: T[], min: number, max: number) =>
+  Array.from({ length: min + Math.floor(Math.random() * (max - min + 1)) }, () => pick(values));
+
+function percentile(sorted: number[], p: number): number {
+  return sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * p))];
+}
+
+function syntheticTrack(): SimilarityFields {
+  return {
+    id: randomUUID(),
+    genre: pick(GENRES),
+    mood: Math.random() < 0.8 ? pick(MOODS) : null,
+    tags: pickSome(TAGS, 1, 5),
+    aiKeywords: pickSome(KEYWORDS, 0, 4),
+    bpm: 60 + Math.floor(Math.random() * 120),
+    key: `${pick(KEYS)} ${Math.random() < 0.5 ? 'major' : 'minor'}`,
+    duration: 120 + Math.floor(Math.random() * 300),
+    // Weighted so three in five tracks are licensable
+    status: Math.random() < 0.6 ? pick(STATUSES.slice(0, 3)) : pick(STATUSES.slice(3)),
+  };
+}
+
+function exactTopK(vectors: Float32Array[], licensable: boolean[], query: number): Set<number> {
+  const top: Array<{ index: number; similarity: number }> = [];
+  for (let i = 0; i < vectors.length; i++) {
+    if (i === query || !licensable[i]) continue;
+    let similarity = 0;
+    for (let d = 0; d < vectors[i].length; d++) similarity += vectors[i][d] * vectors[query][d];
+    if (top.length < k || similarity > top[top.length - 1].similarity) {
+      top.push({ index: i, similarity });
+      top.sort((a, b) => b.similarity - a.similarity);
+      if (top.length > k) top.length = k;
+    }
+  }
+  return new Set(top.map(t => t.index));
+}
+
+const tracks = Array.from({ length: trackCount }, syntheticTrack);
+const vectors = tracks.map(vectorizeTrack);
+const licensable = tracks.map(t => ['verified', 'registered', 'licensed'].includes(t.status || ''));
+const indexById = new Map(tracks.map((t, i) => [t.id, i]));
+
+const index = new SimilarityIndex();
+const buildStart = performance.now();
+index.load(tracks);
+const buildMs = performance.now() - buildStart;
+
+const indexTimings: number[] = [];
+const exactTimings: number[] = [];
+let found = 0;
+let expected = 0;
+for (let q = 0; q < queryCount; q++) {
+  const query = Math.floor(Math.random() * trackCount);
+
+  let start = performance.now();
+  const results = index.similarTo(tracks[query].id, k);
+  indexTimings.push(performance.now() - start);
+
+  start = performance.now();
+  const exact = exactTopK(vectors, licensable, query);
+  exactTimings.push(performance.now() - start);
+
+  expected += exact.size;
+  for (const result of results) {
+    if (exact.has(indexById.get(result.trackId)!)) found++;
+  }
+}
+indexTimings.sort((a, b) => a - b);
+exactTimings.sort((a, b) => a - b);
+
+console.log(`tracks indexed:   ${index.size}`);
+console.log(`build time:       ${buildMs.toFixed(0)} ms`);
+console.log(`recall@${k}:        ${(found / expected).toFixed(3)} over ${queryCount} queries`);
+console.log(`index query:      p50 ${percentile(indexTimings, 0.5).toFixed(2)} ms, p99 ${percentile(indexTimings, 0.99).toFixed(2)} ms`);
+console.log(`exact scan:       p50 ${percentile(exactTimings, 0.5).toFixed(2)} ms, p99 ${percentile(exactTimings, 0.99).toFixed(2)} ms`);
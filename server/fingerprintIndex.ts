@@ -0,0 +1,402 @@
+export interface FingerprintMatch {
+  trackId: string;
+  score: number;
+  matchType: 'exact' | 'partial';
+  // Bit error rate over the best-aligned overlap (0 = identical)
+  bitErrorRate: number;
+  // Word offset of the query within the indexed fingerprint
+  offset: number;
+}
+
+// Fingerprints are hex strings; each 8-char word is one 32-bit sub-hash.
+const WORD_LENGTH = 8;
+// Longest fingerprint kept, the size the acoustic extractor produces
+const MAX_WORDS = 64;
+// Postings are bucketed by the top bits of a word; the low 16 bits are kept
+// as a tag, which together with the bucket identifies the word exactly
+const BUCKET_BITS = 22;
+const BUCKET_COUNT = 1 << BUCKET_BITS;
+// Fingerprint words are stored in fixed-size pages so the catalog can grow
+// without reallocating one huge array
+const PAGE_DOCS = 4096;
+// Tracks added after the last build live in a small map until the posting
+// table is rebuilt; removals are compacted away at the same threshold
+const MAX_PENDING_DOCS = 20_000;
+// Candidates verified per lookup, best-voted first
+const MAX_CANDIDATES = 50;
+// Alignments tried per candidate, most-voted offsets first
+const MAX_OFFSETS = 3;
+// Shorter overlaps than this are too weak to call a match
+const MIN_OVERLAP_WORDS = 8;
+// Unrelated audio disagrees on about half its bits
+const RANDOM_BER = 0.5;
+
+type Posting = number | number[];
+
+/**
+ * Postings in compressed sparse row form: the docs containing a word sit in
+ * docs[offsets[bucket]..offsets[bucket + 1]] with a matching tag. About six
+ * bytes per posting, outside the V8 heap.
+ */
+interface PostingTable {
+  offsets: Uint32Array;
+  docs: Uint32Array;
+  tags: Uint16Array;
+}
+
+function popcount(value: number): number {
+  value -= (value >>> 1) & 0x55555555;
+  value = (value & 0x33333333) + ((value >>> 2) & 0x33333333);
+  return (Math.imul((value + (value >>> 4)) & 0x0f0f0f0f, 0x01010101) >>> 24);
+}
+
+function hexDigit(code: number): number {
+  if (code >= 48 && code <= 57) return code - 48;
+  const lower = code | 32;
+  return lower >= 97 && lower <= 102 ? lower - 87 : -1;
+}
+
+/**
+ * Decode up to MAX_WORDS hex words into target at offset, skipping words with
+ * non-hex characters. Returns the number of words written.
+ */
+function parseWords(fingerprint: string, target: Uint32Array, offset: number): number {
+  const count = Math.min(MAX_WORDS, Math.floor(fingerprint.length / WORD_LENGTH));
+  let kept = 0;
+  for (let w = 0; w < count; w++) {
+    let word = 0;
+    let valid = true;
+    for (let i = w * WORD_LENGTH; i < (w + 1) * WORD_LENGTH; i++) {
+      const digit = hexDigit(fingerprint.charCodeAt(i));
+      if (digit < 0) valid = false;
+      word = (word << 4) | digit;
+    }
+    if (valid) target[offset + kept++] = word >>> 0;
+  }
+  return kept;
+}
+
+function bucketOf(word: number): number {
+  return word >>> (32 - BUCKET_BITS);
+}
+
+/**
+ * In-process inverted index over track fingerprint sub-hashes. Lets uploads be
+ * matched against our own catalog before any external verification call.
+ */
+export class FingerprintIndex {
+  private pages: Uint32Array[] = [];
+  private lengths = new Uint8Array(PAGE_DOCS);
+  private trackIds: (string | null)[] = [];
+  private docByTrack = new Map<string, number>();
+  private table: PostingTable | null = null;
+  // Docs below this are in the posting table
+  private tableDocs = 0;
+  private pending = new Map<number, Posting>();
+  private pendingDocs = 0;
+  private removedDocs = 0;
+  private loaded = false;
+  private readonly scratch = new Uint32Array(MAX_WORDS);
+
+  get size(): number {
+    return this.docByTrack.size;
+  }
+
+  get isLoaded(): boolean {
+    return this.loaded;
+  }
+
+  /**
+   * Bulk-load the index, typically from every fingerprinted track at startup.
+   * Entries may arrive in pages from the database; the posting table is built
+   * once at the end.
+   */
+  async load(entries: Iterable<{ id: string; fingerprint: string }> | AsyncIterable<{ id: string; fingerprint: string }>): Promise<void> {
+    for await (const entry of entries) {
+      this.remove(entry.id);
+      this.append(entry.id, entry.fingerprint);
+    }
+    this.rebuild();
+    this.loaded = true;
+  }
+
+  add(trackId: string, fingerprint: string): void {
+    this.remove(trackId);
+    const doc = this.append(trackId, fingerprint);
+    if (doc < 0) return;
+
+    for (const word of this.distinctWords(doc)) {
+      const posting = this.pending.get(word);
+      if (posting === undefined) {
+        this.pending.set(word, doc);
+      } else if (typeof posting === 'number') {
+        this.pending.set(word, [posting, doc]);
+      } else {
+        posting.push(doc);
+      }
+    }
+    this.pendingDocs++;
+
+    if (this.pendingDocs >= MAX_PENDING_DOCS) {
+      this.rebuild();
+    }
+  }
+
+  remove(trackId: string): void {
+    const doc = this.docByTrack.get(trackId);
+    if (doc === undefined) return;
+
+    // Postings in the table are skipped once the doc is dead; the space is
+    // reclaimed at the next rebuild
+    if (doc >= this.tableDocs) {
+      for (const word of this.distinctWords(doc)) {
+        const posting = this.pending.get(word);
+        if (posting === doc) {
+          this.pending.delete(word);
+        } else if (Array.isArray(posting)) {
+          const remaining = posting.filter(d => d !== doc);
+          this.pending.set(word, remaining.length === 1 ? remaining[0] : remaining);
+        }
+      }
+    }
+
+    this.trackIds[doc] = null;
+    this.lengths[doc] = 0;
+    this.docByTrack.delete(trackId);
+
+    if (++this.removedDocs >= MAX_PENDING_DOCS && this.loaded) {
+      this.rebuild();
+    }
+  }
+
+  /**
+   * Find indexed tracks whose fingerprint matches the query within a bit error
+   * tolerance. Tracks sharing an exact 32-bit word are candidates; if none
+   * verify, words one bit away are probed too. Each candidate is aligned at
+   * its most-voted word offsets and scored by bit error rate over the
+   * overlap, so transcoded copies and clips cut from a longer track still
+   * match. `minScore` 0.5 corresponds to a BER of 0.25.
+   */
+  lookup(fingerprint: string, minScore = 0.5, limit = 10): FingerprintMatch[] {
+    const query = this.toWords(fingerprint);
+    if (query.length === 0) return [];
+
+    let matches = this.verify(query, this.collectVotes(query, false), minScore);
+    if (matches.length === 0) {
+      matches = this.verify(query, this.collectVotes(query, true), minScore);
+    }
+    return matches.sort((a, b) => b.score - a.score).slice(0, limit);
+  }
+
+  private collectVotes(query: Uint32Array, fuzzy: boolean): Map<number, number> {
+    const votes = new Map<number, number>();
+    const addVote = (doc: number) => {
+      if (this.trackIds[doc] !== null) votes.set(doc, (votes.get(doc) || 0) + 1);
+    };
+    const vote = (word: number) => {
+      const table = this.table;
+      if (table) {
+        const tag = word & 0xffff;
+        const bucket = bucketOf(word);
+        for (let i = table.offsets[bucket]; i < table.offsets[bucket + 1]; i++) {
+          if (table.tags[i] === tag) addVote(table.docs[i]);
+        }
+      }
+
+      const posting = this.pending.get(word);
+      if (posting === undefined) return;
+      if (typeof posting === 'number') {
+        addVote(posting);
+      } else {
+        for (const doc of posting) addVote(doc);
+      }
+    };
+
+    for (const word of new Set(query)) {
+      if (!fuzzy) {
+        vote(word);
+        continue;
+      }
+      for (let bit = 0; bit < 32; bit++) {
+        vote((word ^ (1 << bit)) >>> 0);
+      }
+    }
+    return votes;
+  }
+
+  private verify(query: Uint32Array, votes: Map<number, number>, minScore: number): FingerprintMatch[] {
+    const candidates = [...votes]
+      .sort((a, b) => b[1] - a[1])
+      .slice(0, MAX_CANDIDATES);
+
+    const matches: FingerprintMatch[] = [];
+    for (const [doc] of candidates) {
+      const indexed = this.wordsOf(doc);
+      const alignment = this.bestAlignment(query, indexed);
+      if (!alignment) continue;
+
+      const score = Math.max(0, 1 - alignment.bitErrorRate / RANDOM_BER);
+      if (score < minScore) continue;
+
+      matches.push({
+        trackId: this.trackIds[doc]!,
+        score,
+        matchType: alignment.bitErrorRate === 0 && alignment.offset === 0 && query.length === indexed.length
+          ? 'exact'
+          : 'partial',
+        bitErrorRate: alignment.bitErrorRate,
+        offset: alignment.offset,
+      });
+    }
+    return matches;
+  }
+
+  /**
+   * Lowest-BER alignment among the offsets where words agree to within a bit
+   */
+  private bestAlignment(query: Uint32Array, indexed: Uint32Array): { bitErrorRate: number; offset: number } | null {
+    const offsetVotes = new Map<number, number>();
+    for (let i = 0; i < query.length; i++) {
+      for (let j = 0; j < indexed.length; j++) {
+        if (popcount(query[i] ^ indexed[j]) <= 1) {
+          offsetVotes.set(j - i, (offsetVotes.get(j - i) || 0) + 1);
+        }
+      }
+    }
+
+    const minOverlap = Math.min(MIN_OVERLAP_WORDS, query.length, indexed.length);
+    const offsets = [...offsetVotes]
+      .sort((a, b) => b[1] - a[1])
+      .slice(0, MAX_OFFSETS);
+
+    let best: { bitErrorRate: number; offset: number } | null = null;
+    for (const [offset] of offsets) {
+      const from = Math.max(0, -offset);
+      const to = Math.min(query.length, indexed.length - offset);
+      if (to - from < minOverlap) continue;
+
+      let errors = 0;
+      for (let i = from; i < to; i++) {
+        errors += popcount(query[i] ^ indexed[i + offset]);
+      }
+      const bitErrorRate = errors / ((to - from) * 32);
+      if (!best || bitErrorRate < best.bitErrorRate) {
+        best = { bitErrorRate, offset };
+      }
+    }
+    return best;
+  }
+
+  /**
+   * Store a fingerprint under a new doc number without indexing it
+   */
+  private append(trackId: string, fingerprint: string): number {
+    const doc = this.trackIds.length;
+    if (doc % PAGE_DOCS === 0 && this.pages.length === doc / PAGE_DOCS) {
+      this.pages.push(new Uint32Array(PAGE_DOCS * MAX_WORDS));
+    }
+    const length = parseWords(fingerprint, this.pages[Math.floor(doc / PAGE_DOCS)], (doc % PAGE_DOCS) * MAX_WORDS);
+    if (length === 0) return -1;
+
+    if (doc === this.lengths.length) {
+      const grown = new Uint8Array(this.lengths.length * 2);
+      grown.set(this.lengths);
+      this.lengths = grown;
+    }
+    this.lengths[doc] = length;
+    this.trackIds.push(trackId);
+    this.docByTrack.set(trackId, doc);
+    return doc;
+  }
+
+  private wordsOf(doc: number): Uint32Array {
+    const start = (doc % PAGE_DOCS) * MAX_WORDS;
+    return this.pages[Math.floor(doc / PAGE_DOCS)].subarray(start, start + this.lengths[doc]);
+  }
+
+  // Reuses one scratch buffer; callers must finish with the result before
+  // asking for another doc's words
+  private distinctWords(doc: number): Uint32Array {
+    const source = this.wordsOf(doc);
+    const words = this.scratch.subarray(0, source.length);
+    words.set(source);
+    words.sort();
+    let count = 0;
+    for (let i = 0; i < words.length; i++) {
+      if (i === 0 || words[i] !== words[i - 1]) words[count++] = words[i];
+    }
+    return words.subarray(0, count);
+  }
+
+  /**
+   * Rebuild the posting table over every live doc, folding in pending adds
+   * and dropping removed tracks
+   */
+  private rebuild(): void {
+    if (this.docByTrack.size < this.trackIds.length) {
+      this.renumber();
+    }
+
+    const docCount = this.trackIds.length;
+    const offsets = new Uint32Array(BUCKET_COUNT + 1);
+    for (let doc = 0; doc < docCount; doc++) {
+      for (const word of this.distinctWords(doc)) offsets[bucketOf(word) + 1]++;
+    }
+    for (let b = 0; b < BUCKET_COUNT; b++) offsets[b + 1] += offsets[b];
+
+    const docs = new Uint32Array(offsets[BUCKET_COUNT]);
+    const tags = new Uint16Array(offsets[BUCKET_COUNT]);
+    const fill = offsets.slice(0, BUCKET_COUNT);
+    for (let doc = 0; doc < docCount; doc++) {
+      for (const word of this.distinctWords(doc)) {
+        const at = fill[bucketOf(word)]++;
+        docs[at] = doc;
+        tags[at] = word & 0xffff;
+      }
+    }
+
+    this.table = { offsets, docs, tags };
+    this.tableDocs = docCount;
+    this.pending = new Map();
+    this.pendingDocs = 0;
+    this.removedDocs = 0;
+  }
+
+  /**
+   * Give live docs dense numbers so removed tracks stop taking space
+   */
+  private renumber(): void {
+    const oldPages = this.pages;
+    const oldLengths = this.lengths;
+    const oldTrackIds = this.trackIds;
+
+    this.pages = [];
+    this.lengths = new Uint8Array(Math.max(PAGE_DOCS, this.docByTrack.size));
+    this.trackIds = [];
+    this.docByTrack = new Map();
+    for (let oldDoc = 0; oldDoc < oldTrackIds.length; oldDoc++) {
+      const trackId = oldTrackIds[oldDoc];
+      if (trackId === null) continue;
+
+      const doc = this.trackIds.length;
+      if (doc % PAGE_DOCS === 0) {
+        this.pages.push(new Uint32Array(PAGE_DOCS * MAX_WORDS));
+      }
+      const from = (oldDoc % PAGE_DOCS) * MAX_WORDS;
+      this.pages[Math.floor(doc / PAGE_DOCS)].set(
+        oldPages[Math.floor(oldDoc / PAGE_DOCS)].subarray(from, from + oldLengths[oldDoc]),
+        (doc % PAGE_DOCS) * MAX_WORDS
+      );
+      this.lengths[doc] = oldLengths[oldDoc];
+      this.trackIds.push(trackId);
+      this.docByTrack.set(trackId, doc);
+    }
+  }
+
+  private toWords(fingerprint: string): Uint32Array {
+    const words = new Uint32Array(MAX_WORDS);
+    return words.slice(0, parseWords(fingerprint, words, 0));
+  }
+}
+
+export const fingerprintIndex = new FingerprintIndex();
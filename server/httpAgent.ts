@@ -0,0 +1,16 @@
+import http from 'http';
+import https from 'https';
+
+// Shared keep-alive pools for outbound node-fetch calls so each upstream
+// request reuses a warm socket instead of paying a fresh TCP/TLS handshake
+const agentOptions = {
+  keepAlive: true,
+  maxSockets: parseInt(process.env.UPSTREAM_MAX_SOCKETS || '50', 10),
+};
+
+const httpAgent = new http.Agent(agentOptions);
+const httpsAgent = new https.Agent(agentOptions);
+
+export function upstreamAgent(url: URL): http.Agent {
+  return url.protocol === 'http:' ? httpAgent : httpsAgent;
+}
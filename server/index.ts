@@ -1,14 +1,19 @@
 import express, { type Request, Response, NextFunction } from "express";
 import { registerRoutes } from "./routes";
 import { setupVite, serveStatic, log } from "./vite";
+import { storage } from "./storage";
+import { metricsMiddleware, currentRequestMetrics } from "./metrics";
 
 const app = express();
+// First, so body parsing and auth are inside the timed request context
+app.use(metricsMiddleware());
 app.use(express.json());
 app.use(express.urlencoded({ extended: false }));
 
 app.use((req, res, next) => {
   const start = Date.now();
   const path = req.path;
+  const breakdown = currentRequestMetrics();
   let capturedJsonResponse: Record<string, any> | undefined = undefined;
 
   const originalResJson = res.json;
@@ -21,6 +26,9 @@ app.use((req, res, next) => {
     const duration = Date.now() - start;
     if (path.startsWith("/api")) {
       let logLine = `${req.method} ${path} ${res.statusCode} in ${duration}ms`;
+      if (breakdown) {
+        logLine += ` [db ${breakdown.dbQueries}q/${Math.round(breakdown.dbSeconds * 1000)}ms, upstream ${Math.round(breakdown.upstreamSeconds * 1000)}ms]`;
+      }
       if (capturedJsonResponse) {
         logLine += ` :: ${JSON.stringify(capturedJsonResponse)}`;
       }
@@ -60,6 +68,14 @@ app.use((req, res, next) => {
   // this serves both the API and the client.
   // It is the only port that is not firewalled.
   const port = 5000;
+  // Write out buffered activity log entries before the process exits
+  for (const signal of ["SIGINT", "SIGTERM"] as const) {
+    process.once(signal, async () => {
+      await storage.flushActivities();
+      process.exit(0);
+    });
+  }
+
   server.listen({
     port,
     host: "0.0.0.0",
@@ -0,0 +1,288 @@
+import { randomUUID } from 'crypto';
+import { promises as fs } from 'fs';
+import os from 'os';
+import { storage } from './storage';
+import { audioAnalysis, hashAudioFile } from './audioAnalysis';
+import { fingerprintIndex } from './fingerprintIndex';
+import { similarityIndex } from './similarityIndex';
+import { yakoaService } from './yakoaService';
+
+// Uploads are spooled to disk; the queue owns the file and deletes it when done
+export interface IngestFile {
+  path: string;
+  size: number;
+  filename: string;
+  mimetype: string;
+  metadata: { title?: string; artist?: string; album?: string; genre?: string };
+}
+
+// 'pending' means Yakoa had not returned a verdict yet; the track stays in processing
+// until pendingVerifications finalizes it
+export type IngestJobStatus = 'queued' | 'processing' | 'pending' | 'verified' | 'failed' | 'duplicate';
+
+export interface IngestJob {
+  id: string;
+  batchId: string;
+  filename: string;
+  status: IngestJobStatus;
+  trackId?: string;
+  attempts: number;
+  error?: string;
+}
+
+export interface BatchProgress {
+  batchId: string;
+  userId: string;
+  total: number;
+  counts: Record<IngestJobStatus, number>;
+  done: boolean;
+  jobs: IngestJob[];
+  createdAt: string;
+}
+
+interface Batch {
+  id: string;
+  userId: string;
+  jobs: IngestJob[];
+  createdAt: Date;
+}
+
+interface QueueOptions {
+  analysisConcurrency: number;
+  verificationConcurrency: number;
+  maxAttempts: number;
+  retryBaseMs: number;
+  batchRetentionMs: number;
+}
+
+class Semaphore {
+  private active = 0;
+  private readonly waiters: Array<() => void> = [];
+
+  constructor(private readonly limit: number) {}
+
+  async run<T>(task: () => Promise<T>): Promise<T> {
+    if (this.active >= this.limit) {
+      await new Promise<void>(resolve => this.waiters.push(resolve));
+    }
+    this.active++;
+    try {
+      return await task();
+    } finally {
+      this.active--;
+      this.waiters.shift()?.();
+    }
+  }
+}
+
+/**
+ * In-memory ingest queue for bulk catalog uploads. Each file moves the track
+ * through uploaded -> processing -> verified/failed; analysis (ffmpeg decode
+ * and feature extraction on the audio worker pool) and external verification
+ * run in separately bounded stages.
+ */
+export class IngestQueue {
+  private readonly batches = new Map<string, Batch>();
+  private readonly inflightHashes = new Map<string, Promise<string | undefined>>();
+  private readonly analysisStage: Semaphore;
+  private readonly verificationStage: Semaphore;
+  private readonly options: QueueOptions;
+
+  constructor(options: Partial<QueueOptions> = {}) {
+    this.options = {
+      analysisConcurrency: os.cpus().length,
+      verificationConcurrency: 4,
+      maxAttempts: 3,
+      retryBaseMs: 1000,
+      batchRetentionMs: 24 * 60 * 60 * 1000,
+      ...options,
+    };
+    this.analysisStage = new Semaphore(this.options.analysisConcurrency);
+    this.verificationStage = new Semaphore(this.options.verificationConcurrency);
+  }
+
+  /**
+   * Queue a batch of files for a user and start processing in the background
+   */
+  enqueue(userId: string, files: IngestFile[]): BatchProgress {
+    const batch: Batch = {
+      id: randomUUID(),
+      userId,
+      jobs: [],
+      createdAt: new Date(),
+    };
+
+    for (const file of files) {
+      const job: IngestJob = {
+        id: randomUUID(),
+        batchId: batch.id,
+        filename: file.filename,
+        status: 'queued',
+        attempts: 0,
+      };
+      batch.jobs.push(job);
+      void this.process(userId, job, file);
+    }
+
+    this.batches.set(batch.id, batch);
+    setTimeout(() => this.batches.delete(batch.id), this.options.batchRetentionMs).unref();
+    return this.progress(batch.id)!;
+  }
+
+  progress(batchId: string): BatchProgress | undefined {
+    const batch = this.batches.get(batchId);
+    if (!batch) return undefined;
+
+    const counts: Record<IngestJobStatus, number> = {
+      queued: 0,
+      processing: 0,
+      pending: 0,
+      verified: 0,
+      failed: 0,
+      duplicate: 0,
+    };
+    for (const job of batch.jobs) {
+      counts[job.status]++;
+    }
+
+    return {
+      batchId: batch.id,
+      userId: batch.userId,
+      total: batch.jobs.length,
+      counts,
+      done: counts.queued === 0 && counts.processing === 0,
+      jobs: batch.jobs,
+      createdAt: batch.createdAt.toISOString(),
+    };
+  }
+
+  private async process(userId: string, job: IngestJob, file: IngestFile): Promise<void> {
+    try {
+      await this.ingest(userId, job, file);
+    } finally {
+      await fs.unlink(file.path).catch(() => {});
+    }
+  }
+
+  private async ingest(userId: string, job: IngestJob, file: IngestFile): Promise<void> {
+    let fileHash: string;
+    try {
+      fileHash = await hashAudioFile(file.path);
+    } catch (error) {
+      job.status = 'failed';
+      job.error = error instanceof Error ? error.message : 'Unknown error';
+      return;
+    }
+    const hashKey = `${userId}:${fileHash}`;
+
+    // Identical files (in this batch, another batch, or already stored) map to one track
+    const pending = this.inflightHashes.get(hashKey);
+    if (pending) {
+      job.trackId = await pending;
+      job.status = 'duplicate';
+      return;
+    }
+
+    let resolveTrackId!: (trackId: string | undefined) => void;
+    this.inflightHashes.set(hashKey, new Promise(resolve => { resolveTrackId = resolve; }));
+
+    try {
+      const existing = await storage.getTrackByFileHash(userId, fileHash);
+      if (existing) {
+        job.trackId = existing.id;
+        job.status = 'duplicate';
+        return;
+      }
+
+      const track = await storage.createTrack({
+        userId,
+        title: file.metadata.title || file.filename.replace(/\.[^.]+$/, ''),
+        artist: file.metadata.artist || 'Unknown',
+        album: file.metadata.album,
+        genre: file.metadata.genre,
+        fileSize: file.size,
+        fileFormat: file.mimetype,
+        fileHash,
+        audioUrl: `/uploads/${file.filename}`,
+        status: 'uploaded',
+      });
+      job.trackId = track.id;
+      job.status = 'processing';
+      await storage.logUserActivity(userId, 'track_uploaded', 'track', track.id, { batchId: job.batchId });
+
+      await this.runStages(job, track.id, file, fileHash);
+    } catch (error) {
+      job.status = 'failed';
+      job.error = error instanceof Error ? error.message : 'Unknown error';
+      console.error(`Ingest job ${job.id} failed:`, error);
+      if (job.trackId) {
+        await storage.updateTrack(job.trackId, { status: 'failed' }).catch(() => {});
+      }
+    } finally {
+      resolveTrackId(job.trackId);
+      this.inflightHashes.delete(hashKey);
+    }
+  }
+
+  private async runStages(job: IngestJob, trackId: string, file: IngestFile, fileHash: string): Promise<void> {
+    const features = await this.analysisStage.run(() =>
+      this.withRetry(job, async () => {
+        await storage.updateTrack(trackId, { status: 'processing' });
+        return audioAnalysis.analyzeAudioPath(file.path, file.filename, fileHash);
+      })
+    );
+
+    await storage.updateTrack(trackId, {
+      duration: features.duration,
+      sampleRate: features.sampleRate,
+      bitrate: features.bitrate,
+      bpm: features.bpm,
+      key: features.key,
+      fingerprint: features.fingerprint,
+    });
+
+    const catalogMatches = fingerprintIndex.lookup(features.fingerprint);
+    fingerprintIndex.add(trackId, features.fingerprint);
+    if (catalogMatches.length > 0) {
+      await storage.updateTrack(trackId, { status: 'failed' });
+      job.status = 'failed';
+      job.error = `Matches existing catalog track ${catalogMatches[0].trackId}`;
+      return;
+    }
+
+    const originality = await this.verificationStage.run(() =>
+      this.withRetry(job, () =>
+        yakoaService.checkOriginality(`/uploads/${file.filename}`, file.metadata)
+      )
+    );
+
+    if (originality.status === 'pending') {
+      await storage.updateTrack(trackId, { yakoaTokenId: originality.yakoaTokenId });
+      job.status = 'pending';
+      return;
+    }
+
+    // Registration on Story Protocol still requires the owner's wallet approval
+    const track = await storage.updateTrack(trackId, {
+      yakoaTokenId: originality.yakoaTokenId,
+      status: originality.isOriginal ? 'verified' : 'failed',
+    });
+    similarityIndex.upsert(track);
+    job.status = originality.isOriginal ? 'verified' : 'failed';
+  }
+
+  private async withRetry<T>(job: IngestJob, task: () => Promise<T>): Promise<T> {
+    for (let attempt = 1; ; attempt++) {
+      job.attempts++;
+      try {
+        return await task();
+      } catch (error) {
+        if (attempt >= this.options.maxAttempts) throw error;
+        const delay = this.options.retryBaseMs * 2 ** (attempt - 1) * (0.5 + Math.random());
+        await new Promise(resolve => setTimeout(resolve, delay));
+      }
+    }
+  }
+}
+
+export const ingestQueue = new IngestQueue();
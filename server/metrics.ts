@@ -0,0 +1,280 @@
+import { AsyncLocalStorage, AsyncResource } from 'async_hooks';
+import type { Request, RequestHandler } from 'express';
+import { getCacheStats } from './resultCache';
+import { profileSlowRequest } from './slowRequestProfiler';
+
+type Labels = Record<string, string>;
+
+const LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30];
+const SIZE_BUCKETS = [256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864];
+const COUNT_BUCKETS = [0, 1, 2, 5, 10, 20, 50, 100];
+
+function labelKey(labels: Labels): string {
+  return Object.keys(labels)
+    .sort()
+    .map(name => `${name}="${labels[name].replace(/\\/g, '\\\\').replace(/"/g, '\\"').replace(/\n/g, '\\n')}"`)
+    .join(',');
+}
+
+function withLabels(name: string, key: string, extra = ''): string {
+  const all = [key, extra].filter(Boolean).join(',');
+  return all ? `${name}{${all}}` : name;
+}
+
+interface Metric {
+  render(): string[];
+}
+
+const registry: Metric[] = [];
+
+export class Counter implements Metric {
+  private readonly values = new Map<string, number>();
+
+  constructor(private readonly name: string, private readonly help: string) {
+    registry.push(this);
+  }
+
+  inc(labels: Labels = {}, value = 1): void {
+    const key = labelKey(labels);
+    this.values.set(key, (this.values.get(key) || 0) + value);
+  }
+
+  render(): string[] {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} counter`];
+    for (const [key, value] of this.values) lines.push(`${withLabels(this.name, key)} ${value}`);
+    return lines;
+  }
+}
+
+export class Gauge implements Metric {
+  private readonly values = new Map<string, number>();
+
+  constructor(private readonly name: string, private readonly help: string) {
+    registry.push(this);
+  }
+
+  inc(labels: Labels = {}, value = 1): void {
+    const key = labelKey(labels);
+    this.values.set(key, (this.values.get(key) || 0) + value);
+  }
+
+  dec(labels: Labels = {}, value = 1): void {
+    this.inc(labels, -value);
+  }
+
+  set(labels: Labels, value: number): void {
+    this.values.set(labelKey(labels), value);
+  }
+
+  render(): string[] {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} gauge`];
+    for (const [key, value] of this.values) lines.push(`${withLabels(this.name, key)} ${value}`);
+    return lines;
+  }
+}
+
+export class Histogram implements Metric {
+  private readonly series = new Map<string, { counts: number[]; sum: number; count: number }>();
+
+  constructor(
+    private readonly name: string,
+    private readonly help: string,
+    private readonly buckets: number[] = LATENCY_BUCKETS
+  ) {
+    registry.push(this);
+  }
+
+  observe(labels: Labels, value: number): void {
+    const key = labelKey(labels);
+    let series = this.series.get(key);
+    if (!series) {
+      series = { counts: new Array(this.buckets.length).fill(0), sum: 0, count: 0 };
+      this.series.set(key, series);
+    }
+    // Buckets are stored non-cumulative and summed at render time
+    const bucket = this.buckets.findIndex(bound => value <= bound);
+    if (bucket >= 0) series.counts[bucket]++;
+    series.sum += value;
+    series.count++;
+  }
+
+  render(): string[] {
+    const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} histogram`];
+    for (const [key, series] of this.series) {
+      let cumulative = 0;
+      this.buckets.forEach((bound, i) => {
+        cumulative += series.counts[i];
+        lines.push(`${withLabels(`${this.name}_bucket`, key, `le="${bound}"`)} ${cumulative}`);
+      });
+      lines.push(`${withLabels(`${this.name}_bucket`, key, 'le="+Inf"')} ${series.count}`);
+      lines.push(`${withLabels(`${this.name}_sum`, key)} ${series.sum}`);
+      lines.push(`${withLabels(`${this.name}_count`, key)} ${series.count}`);
+    }
+    return lines;
+  }
+}
+
+const httpDuration = new Histogram('http_request_duration_seconds', 'HTTP request latency by route');
+const httpRequests = new Counter('http_requests_total', 'HTTP requests by route and status');
+const httpInFlight = new Gauge('http_requests_in_flight', 'HTTP requests currently being served');
+const httpRequestSize = new Histogram('http_request_size_bytes', 'HTTP request body size by route', SIZE_BUCKETS);
+const httpResponseSize = new Histogram('http_response_size_bytes', 'HTTP response body size by route', SIZE_BUCKETS);
+const httpDbQueries = new Histogram('http_request_db_queries', 'Database queries issued per HTTP request', COUNT_BUCKETS);
+const upstreamDuration = new Histogram('upstream_request_duration_seconds', 'Outbound API call latency by service and operation');
+const upstreamInFlight = new Gauge('upstream_requests_in_flight', 'Outbound API calls currently pending');
+const upstreamErrors = new Counter('upstream_request_errors_total', 'Outbound API calls that failed');
+const dbDuration = new Histogram('db_query_duration_seconds', 'Database query latency');
+const cacheLookups = new Counter('result_cache_lookups_total', 'Result cache lookups by outcome');
+const cacheEntries = new Gauge('result_cache_entries', 'Entries held in each result cache');
+
+interface RequestMetrics {
+  dbQueries: number;
+  dbSeconds: number;
+  upstreamSeconds: number;
+}
+
+const requestContext = new AsyncLocalStorage<RequestMetrics>();
+
+/**
+ * Per-request breakdown (DB and upstream time) for the current async context
+ */
+export function currentRequestMetrics(): RequestMetrics | undefined {
+  return requestContext.getStore();
+}
+
+function elapsedSeconds(start: bigint): number {
+  return Number(process.hrtime.bigint() - start) / 1e9;
+}
+
+// Label by route pattern (/api/tracks/:id), never the raw path, to bound cardinality
+function routeLabel(req: Request): string {
+  return req.route?.path ? `${req.baseUrl}${req.route.path}` : 'unmatched';
+}
+
+export function metricsMiddleware(): RequestHandler {
+  return (req, res, next) => {
+    const start = process.hrtime.bigint();
+    const context: RequestMetrics = { dbQueries: 0, dbSeconds: 0, upstreamSeconds: 0 };
+    httpInFlight.inc();
+    const finishProfile = profileSlowRequest(req);
+
+    let recorded = false;
+    const record = () => {
+      if (recorded) return;
+      recorded = true;
+      httpInFlight.dec();
+
+      const seconds = elapsedSeconds(start);
+      const route = routeLabel(req);
+      const labels = { method: req.method, route };
+      httpDuration.observe(labels, seconds);
+      httpRequests.inc({ ...labels, status: String(res.statusCode) });
+      httpDbQueries.observe(labels, context.dbQueries);
+
+      const requestBytes = parseInt(req.headers['content-length'] || '', 10);
+      if (requestBytes >= 0) httpRequestSize.observe(labels, requestBytes);
+      const responseBytes = parseInt(String(res.getHeader('content-length') ?? ''), 10);
+      if (responseBytes >= 0) httpResponseSize.observe(labels, responseBytes);
+
+      finishProfile(route, seconds * 1000);
+    };
+    res.on('finish', record);
+    res.on('close', record);
+
+    requestContext.run(context, next);
+  };
+}
+
+/**
+ * Wrap middleware that resumes from stream events (multer/busboy), which would
+ * otherwise continue in the socket's async context and drop the request's
+ */
+export function keepRequestContext(middleware: RequestHandler): RequestHandler {
+  return (req, res, next) => middleware(req, res, AsyncResource.bind(next));
+}
+
+/**
+ * Operation label for an upstream endpoint: its first path segment, so ids in
+ * the path (/tokens/123) don't create a series per id
+ */
+export function upstreamOperation(endpoint: string): string {
+  return endpoint.split(/[/?]/).find(Boolean) || 'root';
+}
+
+/**
+ * Time an outbound API call, attributing its latency to the current request
+ */
+export async function timeUpstream<T>(service: string, operation: string, call: () => Promise<T>): Promise<T> {
+  const start = process.hrtime.bigint();
+  upstreamInFlight.inc({ service });
+  try {
+    return await call();
+  } catch (error) {
+    upstreamErrors.inc({ service, operation });
+    throw error;
+  } finally {
+    upstreamInFlight.dec({ service });
+    const seconds = elapsedSeconds(start);
+    upstreamDuration.observe({ service, operation }, seconds);
+    const context = requestContext.getStore();
+    if (context) context.upstreamSeconds += seconds;
+  }
+}
+
+/**
+ * Count and time every promise-returning query issued through a pg-style pool
+ */
+export function instrumentPool<P extends { query: (...args: any[]) => any }>(pool: P): P {
+  const query = pool.query.bind(pool);
+  pool.query = ((...args: any[]) => {
+    const start = process.hrtime.bigint();
+    const context = requestContext.getStore();
+    if (context) context.dbQueries++;
+
+    const result = query(...args);
+    if (result && typeof result.then === 'function') {
+      const done = () => {
+        const seconds = elapsedSeconds(start);
+        dbDuration.observe({}, seconds);
+        if (context) context.dbSeconds += seconds;
+      };
+      result.then(done, done);
+    }
+    return result;
+  }) as P['query'];
+  return pool;
+}
+
+// Cache stats are running totals kept by each cache; the counter only gains
+// what was added since the previous scrape
+const seenCacheLookups = new Map<string, number>();
+
+function syncCacheLookups(cache: string, outcome: string, total: number): void {
+  const key = `${cache}\n${outcome}`;
+  cacheLookups.inc({ cache, outcome }, total - (seenCacheLookups.get(key) || 0));
+  seenCacheLookups.set(key, total);
+}
+
+/**
+ * Prometheus text exposition of every registered metric
+ */
+export function renderMetrics(): string {
+  for (const cache of getCacheStats()) {
+    syncCacheLookups(cache.name, 'hit', cache.hits);
+    syncCacheLookups(cache.name, 'miss', cache.misses);
+    syncCacheLookups(cache.name, 'inflight_hit', cache.inflightHits);
+    cacheEntries.set({ cache: cache.name }, cache.size);
+  }
+
+  const memory = process.memoryUsage();
+  const lines = registry.flatMap(metric => metric.render());
+  lines.push(
+    '# HELP process_resident_memory_bytes Resident memory size',
+    '# TYPE process_resident_memory_bytes gauge',
+    `process_resident_memory_bytes ${memory.rss}`,
+    '# HELP nodejs_heap_used_bytes V8 heap in use',
+    '# TYPE nodejs_heap_used_bytes gauge',
+    `nodejs_heap_used_bytes ${memory.heapUsed}`,
+  );
+  return lines.join('\n') + '\n';
+}
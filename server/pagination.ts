@@ -0,0 +1,103 @@
+import { desc, sql, type SQL } from "drizzle-orm";
+import type { PgColumn } from "drizzle-orm/pg-core";
+
+export interface PageParams {
+  cursor?: string;
+  limit: number;
+}
+
+export interface Page<T> {
+  items: T[];
+  nextCursor: string | null;
+}
+
+interface Cursor {
+  // created_at exactly as Postgres prints it; a JS Date would drop the
+  // microseconds and skip rows created within the same millisecond. Null
+  // once paging has reached the rows without a created_at.
+  createdAt: string | null;
+  id: string;
+}
+
+// Rows selected for paging carry their created_at as text alongside the row
+type Keyed<T> = T & { cursorKey: string | null };
+
+const UUID_PATTERN = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
+const TIMESTAMP_PATTERN = /^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(\.\d{1,6})?(Z|[+-]\d{2}(:?\d{2})?)?$/;
+
+const DEFAULT_PAGE_SIZE = 50;
+const MAX_PAGE_SIZE = 200;
+
+export function parsePageParams(query: Record<string, unknown>): PageParams {
+  const limit = parseInt(query.limit as string) || DEFAULT_PAGE_SIZE;
+  return {
+    cursor: typeof query.cursor === 'string' && query.cursor ? query.cursor : undefined,
+    limit: Math.max(1, Math.min(limit, MAX_PAGE_SIZE)),
+  };
+}
+
+export function wantsPage(query: Record<string, unknown>): boolean {
+  return query.cursor !== undefined || query.limit !== undefined;
+}
+
+function decodeCursor(cursor: string): Cursor | null {
+  try {
+    const decoded = JSON.parse(Buffer.from(cursor, 'base64url').toString('utf8'));
+    if (typeof decoded?.id !== 'string' || !UUID_PATTERN.test(decoded.id)) return null;
+    if (decoded.createdAt !== null && !(typeof decoded.createdAt === 'string' && TIMESTAMP_PATTERN.test(decoded.createdAt))) return null;
+    return { createdAt: decoded.createdAt, id: decoded.id };
+  } catch {
+    return null;
+  }
+}
+
+/**
+ * Extra select column holding created_at at full precision for the cursor
+ */
+export function cursorKey(createdAt: PgColumn): SQL<string | null> {
+  return sql<string | null>`${createdAt}::text`;
+}
+
+/**
+ * Page order: newest first, with rows missing a created_at after all others
+ */
+export function pageOrder(createdAt: PgColumn, id: PgColumn): SQL[] {
+  return [sql`${createdAt} desc nulls last`, desc(id)];
+}
+
+/**
+ * Seek condition for rows after the cursor in pageOrder. Unlike OFFSET, deep
+ * pages cost the same as the first one.
+ */
+export function afterCursor(createdAt: PgColumn, id: PgColumn, cursor?: string): SQL | undefined {
+  if (!cursor) return undefined;
+  const position = decodeCursor(cursor);
+  if (!position) throw new InvalidCursorError();
+
+  if (position.createdAt === null) {
+    return sql`(${createdAt} is null and ${id} < ${position.id})`;
+  }
+  return sql`((${createdAt}, ${id}) < (${position.createdAt}::timestamp, ${position.id}) or ${createdAt} is null)`;
+}
+
+/**
+ * Trim the lookahead row (queries fetch limit + 1), build the next cursor
+ * and drop the cursorKey column from the items
+ */
+export function toPage<T extends { id: string }>(rows: Keyed<T>[], limit: number): Page<T> {
+  const keyed = rows.slice(0, limit);
+  const last = keyed[keyed.length - 1];
+  const nextCursor = rows.length > limit && last
+    ? Buffer.from(JSON.stringify({ createdAt: last.cursorKey, id: last.id })).toString('base64url')
+    : null;
+  const items = keyed.map(({ cursorKey: _cursorKey, ...item }) => item as unknown as T);
+  return { items, nextCursor };
+}
+
+export class InvalidCursorError extends Error {
+  status = 400;
+
+  constructor() {
+    super("Invalid pagination cursor");
+  }
+}
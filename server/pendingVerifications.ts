@@ -0,0 +1,83 @@
+import { storage } from './storage';
+import { similarityIndex } from './similarityIndex';
+import { yakoaService } from './yakoaService';
+
+export interface PendingVerificationOptions {
+  intervalMs: number;
+  batchSize: number;
+  // Tracks still pending at Yakoa after this long are failed rather than polled forever
+  maxPendingMs: number;
+}
+
+/**
+ * Finalizes tracks whose Yakoa scan was still pending when they were
+ * uploaded. Such tracks stay in 'processing' with a token id; this polls
+ * their tokens in the background and moves them to verified or failed.
+ */
+export class PendingVerificationPoller {
+  private timer: NodeJS.Timeout | null = null;
+  private polling = false;
+  private readonly options: PendingVerificationOptions;
+
+  constructor(options: Partial<PendingVerificationOptions> = {}) {
+    this.options = {
+      intervalMs: parseInt(process.env.YAKOA_PENDING_POLL_MS || '60000', 10),
+      batchSize: 50,
+      maxPendingMs: 24 * 60 * 60 * 1000,
+      ...options,
+    };
+  }
+
+  start(): void {
+    if (this.timer) return;
+    this.timer = setInterval(() => {
+      this.pollOnce().catch(error => console.error('Pending verification poll failed:', error));
+    }, this.options.intervalMs);
+    this.timer.unref();
+  }
+
+  stop(): void {
+    if (this.timer) clearInterval(this.timer);
+    this.timer = null;
+  }
+
+  async pollOnce(): Promise<void> {
+    // A slow Yakoa can make one pass outlast the interval
+    if (this.polling) return;
+    this.polling = true;
+    try {
+      const tracks = await storage.getTracksAwaitingVerification(this.options.batchSize);
+      for (const track of tracks) {
+        try {
+          await this.refresh(track.id, track.yakoaTokenId!, track.createdAt);
+        } catch (error) {
+          console.error(`Failed to refresh Yakoa token for track ${track.id}:`, error);
+        }
+      }
+    } finally {
+      this.polling = false;
+    }
+  }
+
+  private async refresh(trackId: string, tokenId: string, createdAt: Date | null): Promise<void> {
+    const result = await yakoaService.refreshOriginality(tokenId);
+
+    if (result.status === 'pending') {
+      const expired = createdAt !== null && Date.now() - createdAt.getTime() > this.options.maxPendingMs;
+      // Updating stamps updatedAt, which moves the track to the back of the queue
+      await storage.updateTrack(trackId, expired
+        ? { status: 'failed', yakoaStatus: 'expired' }
+        : { yakoaStatus: 'pending' });
+      return;
+    }
+
+    // Registration on Story Protocol still requires the owner's wallet approval
+    const track = await storage.updateTrack(trackId, {
+      status: result.isOriginal ? 'verified' : 'failed',
+      yakoaStatus: 'complete',
+    });
+    similarityIndex.upsert(track);
+  }
+}
+
+export const pendingVerifications = new PendingVerificationPoller();
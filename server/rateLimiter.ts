@@ -0,0 +1,170 @@
+import type { Request, RequestHandler, Response } from "express";
+
+interface WindowState {
+  windowStart: number;
+  current: number;
+  previous: number;
+}
+
+export interface RateLimitResult {
+  allowed: boolean;
+  remaining: number;
+  retryAfterMs: number;
+}
+
+/**
+ * Sliding-window counter: the previous fixed window is weighted by how much of
+ * it still overlaps the sliding window, which keeps memory at O(1) per key.
+ */
+export class SlidingWindowLimiter {
+  private readonly windows = new Map<string, WindowState>();
+  private readonly sweepTimer: NodeJS.Timeout;
+
+  constructor(private readonly limit: number, private readonly windowMs: number) {
+    this.sweepTimer = setInterval(() => this.sweep(), windowMs * 2);
+    this.sweepTimer.unref();
+  }
+
+  /**
+   * Check the key against the limit without using up a slot
+   */
+  peek(key: string, now = Date.now(), cost = 1): RateLimitResult {
+    const windowStart = now - (now % this.windowMs);
+    const state = this.roll(key, windowStart);
+
+    const overlap = 1 - (now - windowStart) / this.windowMs;
+    const estimated = state.previous * overlap + state.current;
+
+    if (estimated + cost - 1 >= this.limit) {
+      return {
+        allowed: false,
+        remaining: 0,
+        retryAfterMs: windowStart + this.windowMs - now,
+      };
+    }
+
+    return {
+      allowed: true,
+      remaining: Math.max(0, Math.floor(this.limit - estimated - cost)),
+      retryAfterMs: 0,
+    };
+  }
+
+  /**
+   * Use up `cost` slots for the key, unconditionally
+   */
+  record(key: string, now = Date.now(), cost = 1): void {
+    this.roll(key, now - (now % this.windowMs)).current += cost;
+  }
+
+  consume(key: string, now = Date.now()): RateLimitResult {
+    const result = this.peek(key, now);
+    if (result.allowed) this.record(key, now);
+    return result;
+  }
+
+  private roll(key: string, windowStart: number): WindowState {
+    let state = this.windows.get(key);
+
+    if (!state) {
+      state = { windowStart, current: 0, previous: 0 };
+      this.windows.set(key, state);
+    } else if (state.windowStart !== windowStart) {
+      const elapsedWindows = (windowStart - state.windowStart) / this.windowMs;
+      state.previous = elapsedWindows === 1 ? state.current : 0;
+      state.current = 0;
+      state.windowStart = windowStart;
+    }
+    return state;
+  }
+
+  private sweep(): void {
+    const cutoff = Date.now() - this.windowMs * 2;
+    for (const [key, state] of this.windows) {
+      if (state.windowStart < cutoff) {
+        this.windows.delete(key);
+      }
+    }
+  }
+}
+
+export function rateLimitKey(req: Request): string {
+  const user = req.user as any;
+  return user?.claims?.sub || req.ip || 'anonymous';
+}
+
+/**
+ * A named set of sliding-window limits that are checked and charged together.
+ * Routes that should share an allowance share the instance.
+ */
+export class RateLimitPolicy {
+  private readonly limiters: SlidingWindowLimiter[];
+
+  constructor(readonly name: string, limits: Array<{ limit: number; windowMs: number }>) {
+    this.limiters = limits.map(({ limit, windowMs }) => new SlidingWindowLimiter(limit, windowMs));
+  }
+
+  /**
+   * Check every window before charging any, so a request rejected by one
+   * limit does not use up a slot in the others
+   */
+  peek(key: string, now = Date.now(), cost = 1): RateLimitResult {
+    const results = this.limiters.map(limiter => limiter.peek(`${this.name}:${key}`, now, cost));
+    const blocked = results.filter(result => !result.allowed);
+    if (blocked.length > 0) {
+      return {
+        allowed: false,
+        remaining: 0,
+        retryAfterMs: Math.max(...blocked.map(result => result.retryAfterMs)),
+      };
+    }
+    return {
+      allowed: true,
+      remaining: Math.min(...results.map(result => result.remaining)),
+      retryAfterMs: 0,
+    };
+  }
+
+  /**
+   * Slots the key may still use in one request, 0 if it is already at a limit
+   */
+  available(key: string, now = Date.now()): number {
+    const result = this.peek(key, now, 1);
+    return result.allowed ? result.remaining + 1 : 0;
+  }
+
+  /**
+   * Use up `cost` slots in every window; a negative cost hands slots back
+   */
+  record(key: string, now = Date.now(), cost = 1): void {
+    for (const limiter of this.limiters) {
+      limiter.record(`${this.name}:${key}`, now, cost);
+    }
+  }
+}
+
+export function rejectRateLimited(res: Response, retryAfterMs: number) {
+  res.setHeader('Retry-After', Math.ceil(retryAfterMs / 1000));
+  return res.status(429).json({ message: "Rate limit exceeded" });
+}
+
+/**
+ * Express middleware charging one slot of the policy per request
+ */
+export function rateLimit(
+  policy: RateLimitPolicy,
+  keyBy: (req: Request) => string = rateLimitKey
+): RequestHandler {
+  return (req, res, next) => {
+    const key = keyBy(req);
+    const now = Date.now();
+
+    const result = policy.peek(key, now);
+    if (!result.allowed) {
+      return rejectRateLimited(res, result.retryAfterMs);
+    }
+
+    policy.record(key, now);
+    next();
+  };
+}
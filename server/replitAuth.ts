@@ -6,6 +6,7 @@ import session from "express-session";
 import type { Express, RequestHandler } from "express";
 import memoize from "memoizee";
 import connectPg from "connect-pg-simple";
+import { createHash } from "crypto";
 import { storage } from "./storage";
 
 if (!process.env.REPLIT_DOMAINS) {
@@ -127,6 +128,37 @@ export async function setupAuth(app: Express) {
   });
 }
 
+type RefreshedTokens = client.TokenEndpointResponse & client.TokenEndpointResponseHelpers;
+
+// Parallel requests from one expired session share a single refresh grant,
+// and the result is reused briefly for requests that arrive just after it
+const REFRESH_REUSE_MS = 30 * 1000;
+const refreshes = new Map<string, { promise: Promise<RefreshedTokens>; settledAt?: number }>();
+
+function refreshTokens(refreshToken: string): Promise<RefreshedTokens> {
+  const key = createHash("sha256").update(refreshToken).digest("hex");
+  const existing = refreshes.get(key);
+  if (existing && (!existing.settledAt || Date.now() - existing.settledAt < REFRESH_REUSE_MS)) {
+    return existing.promise;
+  }
+
+  const entry: { promise: Promise<RefreshedTokens>; settledAt?: number } = {
+    promise: getOidcConfig().then(config => client.refreshTokenGrant(config, refreshToken)),
+  };
+  const evict = () => {
+    if (refreshes.get(key) === entry) refreshes.delete(key);
+  };
+  entry.promise.then(
+    () => {
+      entry.settledAt = Date.now();
+      setTimeout(evict, REFRESH_REUSE_MS).unref();
+    },
+    evict
+  );
+  refreshes.set(key, entry);
+  return entry.promise;
+}
+
 export const isAuthenticated: RequestHandler = async (req, res, next) => {
   const user = req.user as any;
 
@@ -146,8 +178,7 @@ export const isAuthenticated: RequestHandler = async (req, res, next) => {
   }
 
   try {
-    const config = await getOidcConfig();
-    const tokenResponse = await client.refreshTokenGrant(config, refreshToken);
+    const tokenResponse = await refreshTokens(refreshToken);
     updateUserSession(user, tokenResponse);
     return next();
   } catch (error) {
@@ -0,0 +1,139 @@
+export interface CacheStore<T> {
+  get(key: string): Promise<T | undefined>;
+  set(key: string, value: T, ttlMs: number): Promise<void>;
+}
+
+export interface CacheOptions<T> {
+  maxEntries: number;
+  ttlMs: number;
+  // Optional shared tier (e.g. Redis) consulted after the in-memory LRU
+  store?: CacheStore<T>;
+  // Results failing this check are returned but not cached (e.g. provisional
+  // or fallback values)
+  shouldCache?: (value: T) => boolean;
+}
+
+export interface CacheStats {
+  name: string;
+  size: number;
+  hits: number;
+  misses: number;
+  inflightHits: number;
+  evictions: number;
+}
+
+const registry = new Set<ResultCache<any>>();
+
+/**
+ * TTL + size-bounded LRU for expensive upstream results. Concurrent callers
+ * asking for the same key share a single in-flight computation.
+ */
+export class ResultCache<T> {
+  private readonly entries = new Map<string, { value: T; expiresAt: number }>();
+  private readonly inflight = new Map<string, Promise<T>>();
+  private hits = 0;
+  private misses = 0;
+  private inflightHits = 0;
+  private evictions = 0;
+
+  constructor(private readonly name: string, private readonly options: CacheOptions<T>) {
+    registry.add(this);
+  }
+
+  async getOrCompute(key: string, compute: () => Promise<T>): Promise<T> {
+    const cached = this.getLocal(key);
+    if (cached !== undefined) {
+      this.hits++;
+      return cached;
+    }
+
+    const pending = this.inflight.get(key);
+    if (pending) {
+      this.inflightHits++;
+      return pending;
+    }
+
+    const promise = this.resolve(key, compute).finally(() => {
+      this.inflight.delete(key);
+    });
+    this.inflight.set(key, promise);
+    return promise;
+  }
+
+  delete(key: string): void {
+    this.entries.delete(key);
+  }
+
+  stats(): CacheStats {
+    return {
+      name: this.name,
+      size: this.entries.size,
+      hits: this.hits,
+      misses: this.misses,
+      inflightHits: this.inflightHits,
+      evictions: this.evictions,
+    };
+  }
+
+  private async resolve(key: string, compute: () => Promise<T>): Promise<T> {
+    const { store, ttlMs } = this.options;
+
+    if (store) {
+      try {
+        const shared = await store.get(key);
+        if (shared !== undefined) {
+          this.hits++;
+          this.setLocal(key, shared);
+          return shared;
+        }
+      } catch (error) {
+        console.warn(`Cache store read failed for ${this.name}:`, error);
+      }
+    }
+
+    this.misses++;
+    const value = await compute();
+    if (this.options.shouldCache && !this.options.shouldCache(value)) {
+      return value;
+    }
+    this.setLocal(key, value);
+
+    if (store) {
+      store.set(key, value, ttlMs).catch(error => {
+        console.warn(`Cache store write failed for ${this.name}:`, error);
+      });
+    }
+
+    return value;
+  }
+
+  private getLocal(key: string): T | undefined {
+    const entry = this.entries.get(key);
+    if (!entry) return undefined;
+
+    if (entry.expiresAt <= Date.now()) {
+      this.entries.delete(key);
+      return undefined;
+    }
+
+    // Re-insert to mark as most recently used
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    return entry.value;
+  }
+
+  private setLocal(key: string, value: T): void {
+    this.entries.delete(key);
+    this.entries.set(key, { value, expiresAt: Date.now() + this.options.ttlMs });
+
+    while (this.entries.size > this.options.maxEntries) {
+      const oldest = this.entries.keys().next().value as string;
+      this.entries.delete(oldest);
+      this.evictions++;
+    }
+  }
+}
+
+export function getCacheStats(): CacheStats[] {
+  return [...registry].map(cache => cache.stats());
+}
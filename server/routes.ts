@@ -1,13 +1,25 @@
-import type { Express } from "express";
+import type { Express, NextFunction, Response } from "express";
 import { createServer, type Server } from "http";
+import { timingSafeEqual } from "crypto";
+import fs from "fs";
+import os from "os";
+import path from "path";
 import { storage } from "./storage";
 import { setupAuth, isAuthenticated } from "./replitAuth";
 import { db } from "./db";
 import { users, tracks, ipAssets, userActivities, licenses, insertTrackSchema, insertLicenseSchema } from "@shared/schema";
 import { desc, eq, and } from "drizzle-orm";
 import { storyService } from "./storyProtocol";
-import { audioAnalysis } from "./audioAnalysis";
+import { audioAnalysis, hashAudioFile, type AudioFeatures } from "./audioAnalysis";
+import { getCacheStats } from "./resultCache";
+import { renderMetrics, keepRequestContext } from "./metrics";
+import { rateLimit, rateLimitKey, rejectRateLimited, RateLimitPolicy } from "./rateLimiter";
+import { ingestQueue } from "./ingestQueue";
+import { fingerprintIndex, type FingerprintMatch } from "./fingerprintIndex";
+import { similarityIndex } from "./similarityIndex";
+import { parsePageParams, wantsPage, InvalidCursorError } from "./pagination";
 import { yakoaService } from "./yakoaService";
+import { pendingVerifications } from "./pendingVerifications";
 import { tomoService } from "./tomoService";
 import { zapperService } from "./zapperService";
 import { blockchainService } from "./blockchainService";
@@ -16,13 +28,7 @@ import { walletConnectService } from "./walletConnectService";
 import multer from "multer";
 import { z } from "zod";
 
-// Configure multer for file uploads
-const upload = multer({
-  storage: multer.memoryStorage(),
-  limits: {
-    fileSize: 100 * 1024 * 1024, // 100MB limit
-  },
-  fileFilter: (req, file, cb) => {
+const audioFileFilter: multer.Options['fileFilter'] = (req, file, cb) => {
     const allowedTypes = [
       'audio/mpeg', 'audio/mp3', 'audio/wav', 'audio/wave', 'audio/x-wav',
       'audio/flac', 'audio/aac', 'audio/ogg', 'audio/webm', 'audio/m4a'
@@ -38,18 +44,170 @@ const upload = multer({
       console.log('Rejected file:', file.originalname, 'mimetype:', file.mimetype);
       cb(new Error('Only audio files are allowed'));
     }
-  }
+};
+
+// Configure multer for file uploads; files are written to disk so a 100MB
+// upload is never held in memory, and deleted once the request ends
+const upload = multer({
+  dest: path.join(os.tmpdir(), 'soundrights-uploads'),
+  limits: {
+    fileSize: 100 * 1024 * 1024, // 100MB limit
+  },
+  fileFilter: audioFileFilter,
 });
 
+// Batch uploads are spooled to disk instead of memory; the ingest queue reads
+// each file when its analysis slot comes up and deletes it afterwards
+const MAX_BATCH_FILES = 100;
+const batchUploadDir = path.join(os.tmpdir(), 'soundrights-ingest');
+
+// Delete spooled files if the request ends without handing them to the queue
+function removeUnclaimedUploads(req: any, res: Response, next: NextFunction) {
+  res.on('close', () => {
+    if (req.uploadsClaimed) return;
+    const files = (req.file ? [req.file] : req.files || []) as Array<{ path: string }>;
+    for (const file of files) {
+      fs.promises.unlink(file.path).catch(() => {});
+    }
+  });
+  next();
+}
+
+// Scrapers present METRICS_TOKEN as a bearer token; without one, only admins
+// signed in to the app can read operational metrics
+function requireMetricsAccess(req: any, res: Response, next: NextFunction) {
+  const token = process.env.METRICS_TOKEN;
+  const presented = /^Bearer (.+)$/.exec(req.headers.authorization || '')?.[1];
+  if (token && presented) {
+    const expected = Buffer.from(token);
+    const actual = Buffer.from(presented);
+    if (actual.length === expected.length && timingSafeEqual(actual, expected)) return next();
+    return res.status(401).json({ message: "Unauthorized" });
+  }
+
+  isAuthenticated(req, res, async () => {
+    try {
+      const user = await storage.getUser(req.user.claims.sub);
+      if (!user || (!user.email?.includes('admin') && user.id !== '1')) {
+        return res.status(403).json({ message: "Admin access required" });
+      }
+      next();
+    } catch (error) {
+      next(error);
+    }
+  });
+}
+
+// Every fingerprinted track, read from the database a page at a time
+async function* catalogFingerprints() {
+  const pageSize = 10_000;
+  let afterId: string | undefined;
+  for (;;) {
+    const rows = await storage.getTrackFingerprints(afterId, pageSize);
+    yield* rows;
+    if (rows.length < pageSize) return;
+    afterId = rows[rows.length - 1].id;
+  }
+}
+
+const HOUR_MS = 60 * 60 * 1000;
+const DAY_MS = 24 * HOUR_MS;
+
+// Per-user upload limits; uploads fan out to paid verification and registration APIs
+const uploadRateLimit = rateLimit(new RateLimitPolicy('upload', [
+  { limit: parseInt(process.env.UPLOAD_RATE_LIMIT_PER_HOUR || '60', 10), windowMs: HOUR_MS },
+  { limit: parseInt(process.env.UPLOAD_RATE_LIMIT_PER_DAY || '500', 10), windowMs: DAY_MS },
+]));
+
+// Catalog ingest has its own per-file allowance, so a large import is not
+// capped by the hourly limit meant for interactive uploads
+const ingestLimits = new RateLimitPolicy('ingest', [
+  { limit: parseInt(process.env.INGEST_RATE_LIMIT_PER_DAY || '1000', 10), windowMs: DAY_MS },
+]);
+
+// Unauthenticated originality checks are limited per client IP
+const originalityRateLimit = rateLimit(new RateLimitPolicy('originality', [
+  { limit: parseInt(process.env.ORIGINALITY_RATE_LIMIT_PER_HOUR || '30', 10), windowMs: HOUR_MS },
+]), (req) => req.ip || 'anonymous');
+
+/**
+ * Spool a batch upload to disk within the caller's ingest allowance. Slots are
+ * reserved before any file is read and multer stops accepting files past the
+ * reservation; slots for files that were not queued are handed back when the
+ * request ends.
+ */
+function ingestUpload(req: any, res: Response, next: NextFunction) {
+  const key = rateLimitKey(req);
+  const reserved = Math.min(MAX_BATCH_FILES, ingestLimits.available(key));
+  if (reserved === 0) {
+    return rejectRateLimited(res, ingestLimits.peek(key).retryAfterMs);
+  }
+
+  ingestLimits.record(key, Date.now(), reserved);
+  res.on('close', () => {
+    const queued = req.uploadsClaimed ? (req.files?.length || 0) : 0;
+    if (queued < reserved) {
+      ingestLimits.record(key, Date.now(), queued - reserved);
+    }
+  });
+
+  const batchUpload = multer({
+    dest: batchUploadDir,
+    limits: {
+      fileSize: 100 * 1024 * 1024,
+      files: reserved,
+    },
+    fileFilter: audioFileFilter,
+  });
+  batchUpload.array('audio', reserved)(req, res, (error?: unknown) => {
+    if (error instanceof multer.MulterError && (error.code === 'LIMIT_FILE_COUNT' || error.code === 'LIMIT_UNEXPECTED_FILE')) {
+      if (reserved < MAX_BATCH_FILES) {
+        res.setHeader('Retry-After', Math.ceil(ingestLimits.peek(key).retryAfterMs / 1000));
+        return res.status(429).json({ message: `Ingest limit allows ${reserved} more file(s) right now` });
+      }
+      return res.status(400).json({ message: `At most ${MAX_BATCH_FILES} files per batch` });
+    }
+    next(error);
+  });
+}
+
 export async function registerRoutes(app: Express): Promise<Server> {
   // Setup authentication
   await setupAuth(app);
 
+  // Build the local fingerprint index in the background; lookups before it
+  // finishes simply fall through to the external verification path
+  fingerprintIndex.load(catalogFingerprints())
+    .then(() => {
+      console.log(`Fingerprint index loaded with ${fingerprintIndex.size} tracks`);
+    })
+    .catch(error => console.error("Failed to load fingerprint index:", error));
+
+  // Tracks whose Yakoa scan was still pending at upload are finalized here
+  pendingVerifications.start();
+
+  storage.getTrackSimilarityFields()
+    .then(rows => {
+      similarityIndex.load(rows);
+      console.log(`Similarity index loaded with ${similarityIndex.size} tracks`);
+    })
+    .catch(error => console.error("Failed to load similarity index:", error));
+
   // Health check
   app.get("/api/health", (req, res) => {
     res.json({ message: "OK" });
   });
 
+  // Hit/miss counters for upstream result caches
+  app.get("/api/cache/stats", requireMetricsAccess, (req, res) => {
+    res.json({ caches: getCacheStats() });
+  });
+
+  // Prometheus scrape endpoint
+  app.get("/metrics", requireMetricsAccess, (req, res) => {
+    res.type('text/plain; version=0.0.4').send(renderMetrics());
+  });
+
   // Auth routes
   app.get('/api/auth/user', isAuthenticated, async (req: any, res) => {
     try {
@@ -68,7 +226,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
   // ALL DEMO ENDPOINTS REMOVED - Authentication required for uploads
 
   // Track upload endpoint for the new MusicUpload component
-  app.post("/api/tracks/upload", isAuthenticated, upload.single('audio'), async (req: any, res) => {
+  app.post("/api/tracks/upload", isAuthenticated, uploadRateLimit, removeUnclaimedUploads, keepRequestContext(upload.single('audio')), async (req: any, res) => {
     try {
       const userId = req.user.claims.sub;
       const file = req.file;
@@ -79,6 +237,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
 
       // Parse metadata from request
       const metadata = JSON.parse(req.body.metadata || '{}');
+      const fileHash = await hashAudioFile(file.path);
       
       // Validate track data
       const trackData = insertTrackSchema.parse({
@@ -90,6 +249,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
         description: metadata.description,
         fileSize: file.size,
         fileFormat: file.mimetype,
+        fileHash,
         status: 'processing'
       });
 
@@ -102,41 +262,56 @@ export async function registerRoutes(app: Express): Promise<Server> {
 
       // Initial analysis only - user must approve before blockchain registration
       let audioFeatures = null;
+      let catalogMatches: FingerprintMatch[] = [];
       try {
-        audioFeatures = await audioAnalysis.analyzeAudioFile(file.buffer, file.originalname);
+        audioFeatures = await audioAnalysis.analyzeAudioPath(file.path, file.originalname, fileHash);
         
         // Update track with audio features but keep processing status
         await storage.updateTrack(track.id, {
           duration: audioFeatures.duration,
+          sampleRate: audioFeatures.sampleRate,
+          bitrate: audioFeatures.bitrate,
           bpm: audioFeatures.bpm,
           key: audioFeatures.key,
+          fingerprint: audioFeatures.fingerprint,
           status: 'processing'
         });
+
+        // Match against our own catalog before paying for an external check
+        catalogMatches = fingerprintIndex.lookup(audioFeatures.fingerprint);
+        fingerprintIndex.add(track.id, audioFeatures.fingerprint);
       } catch (error) {
         console.error("Audio analysis failed:", error);
       }
 
       // Verify authenticity with Yakoa but don't auto-proceed
       let yakoaResult = null;
-      try {
-        yakoaResult = await yakoaService.checkOriginality(trackData.audioUrl || '', metadata);
-        
-        // Store results but require user approval for next step
-        await storage.updateTrack(track.id, {
-          yakoaTokenId: yakoaResult.yakoaTokenId,
-          status: yakoaResult.isOriginal ? 'verified' : 'failed'
-        });
-      } catch (error) {
-        console.error("Yakoa verification failed:", error);
+      if (catalogMatches.length > 0) {
         await storage.updateTrack(track.id, { status: 'failed' });
+      } else {
+        try {
+          yakoaResult = await yakoaService.checkOriginality(trackData.audioUrl || '', metadata);
+          
+          // Store results but require user approval for next step; a scan
+          // still pending at Yakoa leaves the track in processing
+          await storage.updateTrack(track.id, {
+            yakoaTokenId: yakoaResult.yakoaTokenId,
+            status: yakoaResult.status === 'pending' ? 'processing' : yakoaResult.isOriginal ? 'verified' : 'failed'
+          });
+        } catch (error) {
+          console.error("Yakoa verification failed:", error);
+          await storage.updateTrack(track.id, { status: 'failed' });
+        }
       }
 
       // Get updated track with all information
       const finalTrack = await storage.getTrack(track.id);
+      if (finalTrack) similarityIndex.upsert(finalTrack);
       
       res.status(201).json({
         track: finalTrack,
         audioFeatures,
+        catalogMatches,
         yakoaResult,
         requiresApproval: yakoaResult?.isOriginal, // User must approve blockchain registration
         success: true
@@ -147,6 +322,52 @@ export async function registerRoutes(app: Express): Promise<Server> {
     }
   });
 
+  // Bulk catalog ingest - files are processed in the background
+  app.post("/api/tracks/batch", isAuthenticated, removeUnclaimedUploads, keepRequestContext(ingestUpload), async (req: any, res) => {
+    try {
+      const userId = req.user.claims.sub;
+      const files = (req.files || []) as Express.Multer.File[];
+
+      if (files.length === 0) {
+        return res.status(400).json({ message: "At least one audio file is required" });
+      }
+
+      // Optional metadata array, aligned with the uploaded files
+      const metadata = JSON.parse(req.body.metadata || '[]');
+      if (!Array.isArray(metadata)) {
+        return res.status(400).json({ message: "Metadata must be an array" });
+      }
+
+      req.uploadsClaimed = true;
+      const batch = ingestQueue.enqueue(userId, files.map((file, i) => ({
+        path: file.path,
+        size: file.size,
+        filename: file.originalname,
+        mimetype: file.mimetype,
+        metadata: metadata[i] || {},
+      })));
+
+      res.status(202).json(batch);
+    } catch (error) {
+      console.error("Error queueing batch upload:", error);
+      if (error instanceof SyntaxError) {
+        return res.status(400).json({ message: "Invalid metadata JSON" });
+      }
+      res.status(500).json({ message: "Failed to queue batch upload" });
+    }
+  });
+
+  app.get("/api/tracks/batch/:batchId", isAuthenticated, async (req: any, res) => {
+    const userId = req.user.claims.sub;
+    const progress = ingestQueue.progress(req.params.batchId);
+
+    if (!progress || progress.userId !== userId) {
+      return res.status(404).json({ message: "Batch not found" });
+    }
+
+    res.json(progress);
+  });
+
   // New endpoint for user-approved blockchain registration
   app.post("/api/tracks/:id/register-blockchain", isAuthenticated, async (req: any, res) => {
     try {
@@ -200,9 +421,10 @@ export async function registerRoutes(app: Express): Promise<Server> {
           status: 'confirmed',
         });
 
-        await storage.updateTrack(track.id, {
+        const registeredTrack = await storage.updateTrack(track.id, {
           status: 'registered'
         });
+        similarityIndex.upsert(registeredTrack);
 
         await storage.logUserActivity(userId, 'ip_registered', 'ip_asset', ipAsset.ipId);
 
@@ -226,7 +448,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
   });
 
   // Track management routes
-  app.post("/api/tracks", isAuthenticated, upload.single('audio'), async (req: any, res) => {
+  app.post("/api/tracks", isAuthenticated, uploadRateLimit, removeUnclaimedUploads, keepRequestContext(upload.single('audio')), async (req: any, res) => {
     try {
       const userId = req.user.claims.sub;
       const file = req.file;
@@ -235,6 +457,8 @@ export async function registerRoutes(app: Express): Promise<Server> {
         return res.status(400).json({ message: "Audio file is required" });
       }
 
+      const fileHash = await hashAudioFile(file.path);
+
       // Validate track data
       const trackData = insertTrackSchema.parse({
         userId,
@@ -246,6 +470,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
         tags: req.body.tags ? JSON.parse(req.body.tags) : [],
         fileSize: file.size,
         fileFormat: file.mimetype,
+        fileHash,
         status: 'uploaded'
       });
 
@@ -253,17 +478,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
       trackData.audioUrl = `/uploads/${file.originalname}`;
 
       // Analyze audio file for features and similarity detection
-      let audioFeatures: {
-        duration: number;
-        bpm: number;
-        key: string;
-        energy: number;
-        danceability: number;
-        valence: number;
-        acousticness: number;
-        instrumentalness: number;
-        fingerprint: string;
-      } | null = null;
+      let audioFeatures: AudioFeatures | null = null;
       let similarTracks: Array<{
         trackId: string;
         title: string;
@@ -274,17 +489,38 @@ export async function registerRoutes(app: Express): Promise<Server> {
       
       try {
         console.log('Analyzing audio file:', file.originalname);
-        audioFeatures = await audioAnalysis.analyzeAudioFile(file.buffer, file.originalname);
+        audioFeatures = await audioAnalysis.analyzeAudioPath(file.path, file.originalname, fileHash);
         
-        // Get all existing tracks for similarity comparison
-        const existingTracks = await storage.getUserTracks(userId);
-        similarTracks = await audioAnalysis.findSimilarTracks(audioFeatures, existingTracks);
+        // Catalog-wide duplicate check first, then feature similarity against the user's tracks
+        const catalogMatches = fingerprintIndex.lookup(audioFeatures.fingerprint);
+        const matchedTracks = new Map(
+          (await storage.getTracksByIds(catalogMatches.map(match => match.trackId))).map(t => [t.id, t])
+        );
+        for (const match of catalogMatches) {
+          const matchedTrack = matchedTracks.get(match.trackId);
+          if (!matchedTrack) continue;
+          similarTracks.push({
+            trackId: matchedTrack.id,
+            title: matchedTrack.title,
+            artist: matchedTrack.artist,
+            similarity: match.score,
+            matchType: match.matchType
+          });
+        }
+
+        if (similarTracks.length === 0) {
+          const existingTracks = await storage.getUserTracks(userId);
+          similarTracks = await audioAnalysis.findSimilarTracks(audioFeatures, existingTracks);
+        }
         
         // Update track data with analysis results
         if (audioFeatures) {
           trackData.duration = audioFeatures.duration;
+          trackData.sampleRate = audioFeatures.sampleRate;
+          trackData.bitrate = audioFeatures.bitrate;
           trackData.bpm = audioFeatures.bpm;
           trackData.key = audioFeatures.key;
+          trackData.fingerprint = audioFeatures.fingerprint;
           trackData.status = similarTracks.length > 0 ? 'processing' : 'verified';
         }
       } catch (analysisError) {
@@ -292,6 +528,10 @@ export async function registerRoutes(app: Express): Promise<Server> {
       }
 
       const track = await storage.createTrack(trackData);
+      if (track.fingerprint) {
+        fingerprintIndex.add(track.id, track.fingerprint);
+      }
+      similarityIndex.upsert(track);
       
       // Log activity
       await storage.logUserActivity(userId, 'track_uploaded', 'track', track.id);
@@ -447,9 +687,16 @@ export async function registerRoutes(app: Express): Promise<Server> {
   app.get("/api/tracks", isAuthenticated, async (req: any, res) => {
     try {
       const userId = req.user.claims.sub;
+      // ?limit=/&cursor= opt into keyset pagination; without them the full list is returned
+      if (wantsPage(req.query)) {
+        return res.json(await storage.getUserTracksPage(userId, parsePageParams(req.query)));
+      }
       const tracks = await storage.getUserTracks(userId);
       res.json(tracks);
     } catch (error) {
+      if (error instanceof InvalidCursorError) {
+        return res.status(400).json({ message: error.message });
+      }
       console.error("Error fetching tracks:", error);
       res.status(500).json({ message: "Failed to fetch tracks" });
     }
@@ -458,7 +705,10 @@ export async function registerRoutes(app: Express): Promise<Server> {
   app.get("/api/tracks/:id", isAuthenticated, async (req: any, res) => {
     try {
       const trackId = req.params.id;
-      const track = await storage.getTrack(trackId);
+      // ?include=licenses loads the track and its licenses in one query
+      const track = req.query.include === 'licenses'
+        ? await storage.getTrackWithLicenses(trackId)
+        : await storage.getTrack(trackId);
       
       if (!track) {
         return res.status(404).json({ message: "Track not found" });
@@ -477,6 +727,35 @@ export async function registerRoutes(app: Express): Promise<Server> {
     }
   });
 
+  // Licensable tracks closest to this one by tags, mood, genre and audio features
+  app.get("/api/tracks/:id/similar", isAuthenticated, async (req: any, res) => {
+    try {
+      const trackId = req.params.id;
+      const limit = Math.min(parseInt(req.query.limit as string) || 10, 50);
+
+      const track = await storage.getTrack(trackId);
+      if (!track) {
+        return res.status(404).json({ message: "Track not found" });
+      }
+
+      // Index the track on demand if it was added outside this process
+      if (!similarityIndex.has(trackId)) {
+        similarityIndex.upsert(track);
+      }
+
+      const matches = similarityIndex.similarTo(trackId, limit);
+      const similarTracks = await storage.getTracksByIds(matches.map(m => m.trackId));
+      const byId = new Map(similarTracks.map(t => [t.id, t]));
+
+      res.json(matches
+        .filter(m => byId.has(m.trackId))
+        .map(m => ({ ...byId.get(m.trackId)!, similarity: m.similarity })));
+    } catch (error) {
+      console.error("Error fetching similar tracks:", error);
+      res.status(500).json({ message: "Failed to fetch similar tracks" });
+    }
+  });
+
   app.patch("/api/tracks/:id", isAuthenticated, async (req: any, res) => {
     try {
       const trackId = req.params.id;
@@ -493,6 +772,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
 
       const updates = req.body;
       const updatedTrack = await storage.updateTrack(trackId, updates);
+      similarityIndex.upsert(updatedTrack);
       
       await storage.logUserActivity(userId, 'track_updated', 'track', trackId);
       
@@ -518,6 +798,8 @@ export async function registerRoutes(app: Express): Promise<Server> {
       }
 
       await storage.deleteTrack(trackId);
+      fingerprintIndex.remove(trackId);
+      similarityIndex.remove(trackId);
       await storage.logUserActivity(userId, 'track_deleted', 'track', trackId);
       
       res.status(204).send();
@@ -559,9 +841,15 @@ export async function registerRoutes(app: Express): Promise<Server> {
   app.get("/api/licenses", isAuthenticated, async (req: any, res) => {
     try {
       const userId = req.user.claims.sub;
+      if (wantsPage(req.query)) {
+        return res.json(await storage.getUserLicensesPage(userId, parsePageParams(req.query)));
+      }
       const licenses = await storage.getUserLicenses(userId);
       res.json(licenses);
     } catch (error) {
+      if (error instanceof InvalidCursorError) {
+        return res.status(400).json({ message: error.message });
+      }
       console.error("Error fetching licenses:", error);
       res.status(500).json({ message: "Failed to fetch licenses" });
     }
@@ -572,8 +860,8 @@ export async function registerRoutes(app: Express): Promise<Server> {
       const trackId = req.params.trackId;
       const userId = req.user.claims.sub;
       
-      // Verify user has access to track
-      const track = await storage.getTrack(trackId);
+      // Verify user has access to track; licenses come back in the same query
+      const track = await storage.getTrackWithLicenses(trackId);
       if (!track) {
         return res.status(404).json({ message: "Track not found" });
       }
@@ -582,8 +870,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
         return res.status(403).json({ message: "Access denied" });
       }
 
-      const licenses = await storage.getTrackLicenses(trackId);
-      res.json(licenses);
+      res.json(track.licenses);
     } catch (error) {
       console.error("Error fetching track licenses:", error);
       res.status(500).json({ message: "Failed to fetch track licenses" });
@@ -902,7 +1189,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
   });
 
   // Yakoa IP Authentication API routes
-  app.post("/api/yakoa/check-originality", async (req: any, res) => {
+  app.post("/api/yakoa/check-originality", originalityRateLimit, async (req: any, res) => {
     try {
       const { mediaUrl, metadata } = req.body;
       
@@ -1386,6 +1673,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
   app.get('/api/user/activities', isAuthenticated, async (req: any, res) => {
     try {
       const userId = req.user.claims.sub;
+      await storage.flushActivities();
       // Get recent activities for the user
       const activities = await db.select()
         .from(userActivities)
@@ -1416,6 +1704,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
       const userId = req.user.claims.sub;
       
       // Collect all user data
+      await storage.flushActivities();
       const [user, tracks, licenses, activities, ipAssets] = await Promise.all([
         storage.getUser(userId),
         storage.getUserTracks(userId),
@@ -1555,6 +1844,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
         return res.status(403).json({ message: "Admin access required" });
       }
 
+      await storage.flushActivities();
       const logs = await db.select()
         .from(schema.userActivities)
         .orderBy(desc(schema.userActivities.createdAt))
@@ -1576,6 +1866,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
         return res.status(403).json({ message: "Admin access required" });
       }
 
+      await storage.flushActivities();
       const [users, tracks, licenses, ipAssets, activities] = await Promise.all([
         db.select().from(schema.users),
         db.select().from(schema.tracks),
@@ -1647,6 +1938,8 @@ export async function registerRoutes(app: Express): Promise<Server> {
       const { trackId } = req.params;
       
       await storage.deleteTrack(trackId);
+      fingerprintIndex.remove(trackId);
+      similarityIndex.remove(trackId);
       await storage.logUserActivity(adminUserId, 'track_deleted_by_admin', 'track', trackId);
 
       res.json({ message: "Track deleted successfully" });
@@ -0,0 +1,269 @@
+import type { Track } from "@shared/schema";
+
+export type SimilarityFields = Pick<
+  Track,
+  'id' | 'genre' | 'mood' | 'tags' | 'aiKeywords' | 'bpm' | 'key' | 'duration' | 'status'
+>;
+
+export interface SimilarTrack {
+  trackId: string;
+  similarity: number;
+}
+
+const TEXT_DIMS = 48;
+const DIMS = 64;
+const TEXT_WEIGHT = 0.8;
+const AUDIO_WEIGHT = 0.6;
+
+// Random-hyperplane LSH: TABLES independent hashes of HASH_BITS bits each
+const TABLES = 16;
+const HASH_BITS = 12;
+// Below this size an exact scan is cheaper than probing buckets
+const EXACT_SCAN_LIMIT = 2000;
+
+const LICENSABLE_STATUSES = new Set(['verified', 'registered', 'licensed']);
+const KEY_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B'];
+
+function fnv1a(text: string): number {
+  let hash = 0x811c9dc5;
+  for (let i = 0; i < text.length; i++) {
+    hash ^= text.charCodeAt(i);
+    hash = Math.imul(hash, 0x01000193);
+  }
+  return hash >>> 0;
+}
+
+function normalize(vector: Float32Array, from = 0, to = vector.length): void {
+  let norm = 0;
+  for (let i = from; i < to; i++) norm += vector[i] * vector[i];
+  if (norm === 0) return;
+  const scale = 1 / Math.sqrt(norm);
+  for (let i = from; i < to; i++) vector[i] *= scale;
+}
+
+/**
+ * Compact float32 embedding of a track's descriptive tags plus audio features.
+ * Text fields are feature-hashed; cosine similarity is a plain dot product.
+ */
+export function vectorizeTrack(track: SimilarityFields): Float32Array {
+  const vector = new Float32Array(DIMS);
+
+  const terms: Array<[string, number]> = [];
+  if (track.genre) terms.push([`genre:${track.genre}`, 2]);
+  if (track.mood) terms.push([`mood:${track.mood}`, 1.5]);
+  for (const tag of track.tags || []) terms.push([`tag:${tag}`, 1]);
+  for (const keyword of track.aiKeywords || []) terms.push([`kw:${keyword}`, 1]);
+
+  for (const [term, weight] of terms) {
+    const hash = fnv1a(term.trim().toLowerCase());
+    vector[hash % TEXT_DIMS] += hash & 0x80000000 ? -weight : weight;
+  }
+  normalize(vector, 0, TEXT_DIMS);
+  for (let i = 0; i < TEXT_DIMS; i++) vector[i] *= TEXT_WEIGHT;
+
+  const audio = TEXT_DIMS;
+  if (track.bpm) {
+    // Tempo on a log scale so half/double time land close together
+    const octave = Math.log2(track.bpm / 60);
+    vector[audio] = Math.cos(2 * Math.PI * octave);
+    vector[audio + 1] = Math.sin(2 * Math.PI * octave);
+    vector[audio + 2] = (track.bpm - 120) / 60;
+  }
+  if (track.key) {
+    const [name, mode] = track.key.split(' ');
+    const pitch = KEY_NAMES.indexOf(name);
+    if (pitch >= 0) {
+      // Circle-of-fifths position, so related keys are neighbours
+      const fifths = (pitch * 7) % 12;
+      vector[audio + 3] = Math.cos((2 * Math.PI * fifths) / 12);
+      vector[audio + 4] = Math.sin((2 * Math.PI * fifths) / 12);
+      vector[audio + 5] = mode === 'minor' ? -0.5 : 0.5;
+    }
+  }
+  if (track.duration) {
+    vector[audio + 6] = Math.log2(track.duration / 180);
+  }
+  normalize(vector, audio, DIMS);
+  for (let i = audio; i < DIMS; i++) vector[i] *= AUDIO_WEIGHT;
+
+  normalize(vector);
+  return vector;
+}
+
+/**
+ * Approximate nearest-neighbour index over track vectors. Vectors live in one
+ * contiguous Float32Array; LSH buckets narrow each query to a candidate set
+ * that is then re-ranked exactly. Inserts and removals are incremental.
+ */
+export class SimilarityIndex {
+  private vectors = new Float32Array(1024 * DIMS);
+  private licensable = new Uint8Array(1024);
+  private readonly trackIds: (string | null)[] = [];
+  private readonly slotByTrack = new Map<string, number>();
+  private readonly freeSlots: number[] = [];
+  private readonly hyperplanes: Float32Array;
+  private readonly buckets: Map<number, number[]>[] = Array.from({ length: TABLES }, () => new Map());
+  private readonly slotHashes: Uint32Array[] = Array.from({ length: TABLES }, () => new Uint32Array(1024));
+
+  constructor(seed = 42) {
+    // Deterministic hyperplanes so restarts produce identical buckets
+    let state = seed >>> 0;
+    const random = () => {
+      state = (Math.imul(state, 1664525) + 1013904223) >>> 0;
+      return state / 0x100000000;
+    };
+    this.hyperplanes = new Float32Array(TABLES * HASH_BITS * DIMS);
+    for (let i = 0; i < this.hyperplanes.length; i++) {
+      // Box-Muller for Gaussian components
+      this.hyperplanes[i] = Math.sqrt(-2 * Math.log(random() || 1e-12)) * Math.cos(2 * Math.PI * random());
+    }
+  }
+
+  get size(): number {
+    return this.slotByTrack.size;
+  }
+
+  has(trackId: string): boolean {
+    return this.slotByTrack.has(trackId);
+  }
+
+  load(tracks: Iterable<SimilarityFields>): void {
+    for (const track of tracks) {
+      this.upsert(track);
+    }
+  }
+
+  upsert(track: SimilarityFields): void {
+    this.remove(track.id);
+
+    const slot = this.freeSlots.length > 0 ? this.freeSlots.pop()! : this.trackIds.length;
+    this.ensureCapacity(slot + 1);
+    this.vectors.set(vectorizeTrack(track), slot * DIMS);
+    this.licensable[slot] = LICENSABLE_STATUSES.has(track.status || '') ? 1 : 0;
+    this.trackIds[slot] = track.id;
+    this.slotByTrack.set(track.id, slot);
+
+    for (let table = 0; table < TABLES; table++) {
+      const hash = this.hash(table, slot);
+      this.slotHashes[table][slot] = hash;
+      const bucket = this.buckets[table].get(hash);
+      if (bucket) bucket.push(slot);
+      else this.buckets[table].set(hash, [slot]);
+    }
+  }
+
+  remove(trackId: string): void {
+    const slot = this.slotByTrack.get(trackId);
+    if (slot === undefined) return;
+
+    for (let table = 0; table < TABLES; table++) {
+      const hash = this.slotHashes[table][slot];
+      const bucket = this.buckets[table].get(hash);
+      if (!bucket) continue;
+      const position = bucket.indexOf(slot);
+      if (position >= 0) bucket.splice(position, 1);
+      if (bucket.length === 0) this.buckets[table].delete(hash);
+    }
+
+    this.trackIds[slot] = null;
+    this.licensable[slot] = 0;
+    this.slotByTrack.delete(trackId);
+    this.freeSlots.push(slot);
+  }
+
+  /**
+   * Top-k licensable tracks most similar to an indexed track
+   */
+  similarTo(trackId: string, k = 10): SimilarTrack[] {
+    const slot = this.slotByTrack.get(trackId);
+    if (slot === undefined) return [];
+
+    const query = this.vectors.subarray(slot * DIMS, (slot + 1) * DIMS);
+    return this.search(query, k, slot);
+  }
+
+  search(query: Float32Array, k = 10, excludeSlot = -1): SimilarTrack[] {
+    if (this.size <= EXACT_SCAN_LIMIT) {
+      return this.rank(this.slotByTrack.values(), query, k, excludeSlot);
+    }
+
+    // Too few licensable collisions (e.g. an outlier query, or a neighbourhood
+    // of unverified tracks): fall back to an exact scan
+    const top = this.rank(this.probe(query), query, k, excludeSlot);
+    return top.length >= k ? top : this.rank(this.slotByTrack.values(), query, k, excludeSlot);
+  }
+
+  private rank(candidates: Iterable<number>, query: Float32Array, k: number, excludeSlot: number): SimilarTrack[] {
+    const top: SimilarTrack[] = [];
+    let worst = -Infinity;
+    for (const slot of candidates) {
+      if (slot === excludeSlot || !this.licensable[slot]) continue;
+
+      let similarity = 0;
+      const offset = slot * DIMS;
+      for (let d = 0; d < DIMS; d++) similarity += this.vectors[offset + d] * query[d];
+      if (top.length >= k && similarity <= worst) continue;
+
+      top.push({ trackId: this.trackIds[slot]!, similarity });
+      if (top.length > k) {
+        top.sort((a, b) => b.similarity - a.similarity);
+        top.length = k;
+      }
+      worst = top.length >= k ? Math.min(...top.map(t => t.similarity)) : -Infinity;
+    }
+
+    return top.sort((a, b) => b.similarity - a.similarity);
+  }
+
+  /**
+   * Gather candidates from each table's bucket plus all buckets one bit away
+   */
+  private probe(query: Float32Array): Set<number> {
+    const candidates = new Set<number>();
+    for (let table = 0; table < TABLES; table++) {
+      const hash = this.hashVector(table, query, 0);
+      for (let flip = -1; flip < HASH_BITS; flip++) {
+        const bucket = this.buckets[table].get(flip < 0 ? hash : hash ^ (1 << flip));
+        if (!bucket) continue;
+        for (const slot of bucket) candidates.add(slot);
+      }
+    }
+    return candidates;
+  }
+
+  private hash(table: number, slot: number): number {
+    return this.hashVector(table, this.vectors, slot * DIMS);
+  }
+
+  private hashVector(table: number, source: Float32Array, offset: number): number {
+    let hash = 0;
+    for (let bit = 0; bit < HASH_BITS; bit++) {
+      const plane = (table * HASH_BITS + bit) * DIMS;
+      let dot = 0;
+      for (let d = 0; d < DIMS; d++) dot += this.hyperplanes[plane + d] * source[offset + d];
+      if (dot > 0) hash |= 1 << bit;
+    }
+    return hash;
+  }
+
+  private ensureCapacity(slots: number): void {
+    if (slots <= this.licensable.length) return;
+
+    const capacity = Math.max(slots, this.licensable.length * 2);
+    const vectors = new Float32Array(capacity * DIMS);
+    vectors.set(this.vectors);
+    this.vectors = vectors;
+
+    const licensable = new Uint8Array(capacity);
+    licensable.set(this.licensable);
+    this.licensable = licensable;
+
+    for (let table = 0; table < TABLES; table++) {
+      const hashes = new Uint32Array(capacity);
+      hashes.set(this.slotHashes[table]);
+      this.slotHashes[table] = hashes;
+    }
+  }
+}
+
+export const similarityIndex = new SimilarityIndex();
@@ -0,0 +1,53 @@
+import { Session } from 'inspector';
+import { promises as fs } from 'fs';
+import os from 'os';
+import path from 'path';
+import type { Request } from 'express';
+
+// Disabled unless PROFILE_SAMPLE_RATE > 0. Sampled requests run under the V8
+// CPU profiler; the profile is kept only if the request took longer than
+// PROFILE_SLOW_MS. Open the .cpuprofile files in Chrome DevTools.
+const sampleRate = parseFloat(process.env.PROFILE_SAMPLE_RATE || '0');
+const slowMs = parseInt(process.env.PROFILE_SLOW_MS || '1000', 10);
+const profileDir = process.env.PROFILE_DIR || path.join(os.tmpdir(), 'soundrights-profiles');
+
+let session: Session | null = null;
+let profiling = false;
+
+function post<T = any>(method: string, params?: object): Promise<T> {
+  return new Promise((resolve, reject) => {
+    session!.post(method, params, (error, result) => (error ? reject(error) : resolve(result as T)));
+  });
+}
+
+const noop = () => {};
+
+/**
+ * Start a CPU profile for a sampled request. Returns a callback to invoke when
+ * the request finishes. The V8 profiler is process-wide, so only one request
+ * is profiled at a time and the profile also covers concurrent work.
+ */
+export function profileSlowRequest(req: Request): (route: string, durationMs: number) => void {
+  if (sampleRate <= 0 || profiling || Math.random() >= sampleRate) return noop;
+
+  profiling = true;
+  if (!session) {
+    session = new Session();
+    session.connect();
+  }
+  const started = post('Profiler.enable').then(() => post('Profiler.start'));
+
+  return (route, durationMs) => {
+    started
+      .then(() => post<{ profile: object }>('Profiler.stop'))
+      .then(async ({ profile }) => {
+        if (durationMs < slowMs) return;
+        await fs.mkdir(profileDir, { recursive: true });
+        const name = `${Date.now()}-${req.method}-${route.replace(/[^a-zA-Z0-9]+/g, '_')}-${Math.round(durationMs)}ms.cpuprofile`;
+        await fs.writeFile(path.join(profileDir, name), JSON.stringify(profile));
+        console.log(`Slow request profile written: ${path.join(profileDir, name)}`);
+      })
+      .catch(error => console.warn('CPU profile capture failed:', error))
+      .finally(() => { profiling = false; });
+  };
+}
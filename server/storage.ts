@@ -15,7 +15,9 @@ import {
   type UserActivity,
 } from "@shared/schema";
 import { db } from "./db";
-import { eq, desc, and } from "drizzle-orm";
+import type { SimilarityFields } from "./similarityIndex";
+import { afterCursor, cursorKey, pageOrder, toPage, type Page, type PageParams } from "./pagination";
+import { eq, asc, desc, and, gt, isNotNull, inArray, getTableColumns } from "drizzle-orm";
 
 // Interface for storage operations
 export interface IStorage {
@@ -27,14 +29,22 @@ export interface IStorage {
   createTrack(track: InsertTrack): Promise<Track>;
   getTrack(id: string): Promise<Track | undefined>;
   getUserTracks(userId: string): Promise<Track[]>;
+  getUserTracksPage(userId: string, page: PageParams): Promise<Page<Track>>;
+  getTrackWithLicenses(id: string): Promise<(Track & { licenses: License[] }) | undefined>;
   updateTrack(id: string, updates: Partial<Track>): Promise<Track>;
   deleteTrack(id: string): Promise<void>;
+  getTrackFingerprints(afterId: string | undefined, limit: number): Promise<Array<{ id: string; fingerprint: string }>>;
+  getTrackByFileHash(userId: string, fileHash: string): Promise<Track | undefined>;
+  getTracksByIds(ids: string[]): Promise<Track[]>;
+  getTrackSimilarityFields(): Promise<SimilarityFields[]>;
+  getTracksAwaitingVerification(limit: number): Promise<Track[]>;
   
   // License operations
   createLicense(license: InsertLicense): Promise<License>;
   getLicense(id: string): Promise<License | undefined>;
   getTrackLicenses(trackId: string): Promise<License[]>;
   getUserLicenses(userId: string): Promise<License[]>;
+  getUserLicensesPage(userId: string, page: PageParams): Promise<Page<License>>;
   
   // Activity logging
   logUserActivity(userId: string, action: string, resourceType?: string, resourceId?: string, metadata?: any): Promise<void>;
@@ -47,7 +57,18 @@ export interface IStorage {
   updateIpAssetStatus(id: string, status: string, txHash?: string): Promise<IpAsset>;
 }
 
+type ActivityRow = typeof userActivities.$inferInsert;
+
+const ACTIVITY_FLUSH_INTERVAL_MS = 2000;
+const ACTIVITY_FLUSH_BATCH_SIZE = 200;
+
 export class DatabaseStorage implements IStorage {
+  // Activity rows are buffered and written in batches instead of one
+  // insert per request
+  private pendingActivities: ActivityRow[] = [];
+  private activityFlushTimer: NodeJS.Timeout | null = null;
+  private activityWrite: Promise<void> = Promise.resolve();
+
   // User operations
   async getUser(id: string): Promise<User | undefined> {
     const [user] = await db.select().from(users).where(eq(users.id, id));
@@ -91,6 +112,31 @@ export class DatabaseStorage implements IStorage {
       .orderBy(desc(tracks.createdAt));
   }
 
+  async getUserTracksPage(userId: string, page: PageParams): Promise<Page<Track>> {
+    const rows = await db
+      .select({ ...getTableColumns(tracks), cursorKey: cursorKey(tracks.createdAt) })
+      .from(tracks)
+      .where(and(
+        eq(tracks.userId, userId),
+        afterCursor(tracks.createdAt, tracks.id, page.cursor)
+      ))
+      .orderBy(...pageOrder(tracks.createdAt, tracks.id))
+      .limit(page.limit + 1);
+    return toPage(rows, page.limit);
+  }
+
+  async getTrackWithLicenses(id: string): Promise<(Track & { licenses: License[] }) | undefined> {
+    // Single relational query instead of one licenses lookup per track
+    return await db.query.tracks.findFirst({
+      where: eq(tracks.id, id),
+      with: {
+        licenses: {
+          orderBy: [desc(licenses.createdAt)],
+        },
+      },
+    });
+  }
+
   async updateTrack(id: string, updates: Partial<Track>): Promise<Track> {
     const [track] = await db
       .update(tracks)
@@ -104,6 +150,59 @@ export class DatabaseStorage implements IStorage {
     await db.delete(tracks).where(eq(tracks.id, id));
   }
 
+  // Paged by id so loading a large catalog never holds every fingerprint string at once
+  async getTrackFingerprints(afterId: string | undefined, limit: number): Promise<Array<{ id: string; fingerprint: string }>> {
+    const rows = await db
+      .select({ id: tracks.id, fingerprint: tracks.fingerprint })
+      .from(tracks)
+      .where(and(
+        isNotNull(tracks.fingerprint),
+        afterId ? gt(tracks.id, afterId) : undefined
+      ))
+      .orderBy(tracks.id)
+      .limit(limit);
+    return rows as Array<{ id: string; fingerprint: string }>;
+  }
+
+  async getTracksByIds(ids: string[]): Promise<Track[]> {
+    if (ids.length === 0) return [];
+    return await db.select().from(tracks).where(inArray(tracks.id, ids));
+  }
+
+  // Least recently checked first, so a long backlog is worked through in turn
+  async getTracksAwaitingVerification(limit: number): Promise<Track[]> {
+    return await db
+      .select()
+      .from(tracks)
+      .where(and(eq(tracks.status, 'processing'), isNotNull(tracks.yakoaTokenId)))
+      .orderBy(asc(tracks.updatedAt))
+      .limit(limit);
+  }
+
+  async getTrackSimilarityFields(): Promise<SimilarityFields[]> {
+    return await db
+      .select({
+        id: tracks.id,
+        genre: tracks.genre,
+        mood: tracks.mood,
+        tags: tracks.tags,
+        aiKeywords: tracks.aiKeywords,
+        bpm: tracks.bpm,
+        key: tracks.key,
+        duration: tracks.duration,
+        status: tracks.status,
+      })
+      .from(tracks);
+  }
+
+  async getTrackByFileHash(userId: string, fileHash: string): Promise<Track | undefined> {
+    const [track] = await db
+      .select()
+      .from(tracks)
+      .where(and(eq(tracks.userId, userId), eq(tracks.fileHash, fileHash)));
+    return track;
+  }
+
   // License operations
   async createLicense(licenseData: InsertLicense): Promise<License> {
     const [license] = await db
@@ -136,6 +235,19 @@ export class DatabaseStorage implements IStorage {
       .orderBy(desc(licenses.createdAt));
   }
 
+  async getUserLicensesPage(userId: string, page: PageParams): Promise<Page<License>> {
+    const rows = await db
+      .select({ ...getTableColumns(licenses), cursorKey: cursorKey(licenses.createdAt) })
+      .from(licenses)
+      .where(and(
+        eq(licenses.licenseeId, userId),
+        afterCursor(licenses.createdAt, licenses.id, page.cursor)
+      ))
+      .orderBy(...pageOrder(licenses.createdAt, licenses.id))
+      .limit(page.limit + 1);
+    return toPage(rows, page.limit);
+  }
+
   // Activity logging
   async logUserActivity(
     userId: string, 
@@ -144,13 +256,60 @@ export class DatabaseStorage implements IStorage {
     resourceId?: string, 
     metadata?: any
   ): Promise<void> {
-    await db.insert(userActivities).values({
+    this.pendingActivities.push({
       userId,
       action,
       resourceType,
       resourceId,
       metadata,
+      createdAt: new Date(),
     });
+
+    if (this.pendingActivities.length >= ACTIVITY_FLUSH_BATCH_SIZE) {
+      void this.flushActivities();
+    } else if (!this.activityFlushTimer) {
+      this.activityFlushTimer = setTimeout(() => void this.flushActivities(), ACTIVITY_FLUSH_INTERVAL_MS);
+      this.activityFlushTimer.unref();
+    }
+  }
+
+  /**
+   * Write buffered activity rows. Resolves once every row logged before the
+   * call is stored, so reads that follow see them.
+   */
+  async flushActivities(): Promise<void> {
+    if (this.activityFlushTimer) {
+      clearTimeout(this.activityFlushTimer);
+      this.activityFlushTimer = null;
+    }
+
+    const batch = this.pendingActivities;
+    this.pendingActivities = [];
+    const write = this.activityWrite.then(() => (batch.length > 0 ? this.writeActivities(batch) : undefined));
+    this.activityWrite = write;
+    await write;
+  }
+
+  private async writeActivities(batch: ActivityRow[]): Promise<void> {
+    try {
+      await db.insert(userActivities).values(batch);
+      return;
+    } catch (error) {
+      console.error(`Batched write of ${batch.length} activity log entries failed, retrying row by row:`, error);
+    }
+
+    // One bad row (e.g. a deleted user's foreign key) must not drop the rest
+    let dropped = 0;
+    for (const row of batch) {
+      try {
+        await db.insert(userActivities).values(row);
+      } catch {
+        dropped++;
+      }
+    }
+    if (dropped > 0) {
+      console.error(`Dropped ${dropped} of ${batch.length} activity log entries`);
+    }
   }
 
   // IP Asset operations for Story Protocol
@@ -2,6 +2,8 @@ import { StoryClient, StoryConfig, aeneid } from '@story-protocol/core-sdk';
 import { http, createWalletClient, createPublicClient } from 'viem';
 import { privateKeyToAccount } from 'viem/accounts';
 import fetch from 'node-fetch';
+import { upstreamAgent } from './httpAgent';
+import { timeUpstream, upstreamOperation } from './metrics';
 
 // Story Protocol service for IP registration
 export class StoryProtocolService {
@@ -37,15 +39,16 @@ export class StoryProtocolService {
 
   private async makeStoryAPIRequest(endpoint: string, options: any = {}) {
     const url = `${this.baseUrl}${endpoint}`;
-    const response = await fetch(url, {
+    const response = await timeUpstream('story', upstreamOperation(endpoint), () => fetch(url, {
       ...options,
+      agent: upstreamAgent,
       headers: {
         'X-API-Key': this.apiKey,
         'X-CHAIN': 'story-aeneid',
         'Content-Type': 'application/json',
         ...options.headers,
       },
-    });
+    }));
 
     if (!response.ok) {
       throw new Error(`Story Protocol API error: ${response.status} ${response.statusText}`);
@@ -1,4 +1,6 @@
 import fetch from 'node-fetch';
+import { upstreamAgent } from './httpAgent';
+import { timeUpstream, upstreamOperation } from './metrics';
 
 export interface TomoUser {
   id: string;
@@ -46,15 +48,16 @@ export class TomoService {
     }
 
     const url = `${this.baseUrl}${endpoint}`;
-    const response = await fetch(url, {
+    const response = await timeUpstream('tomo', upstreamOperation(endpoint), () => fetch(url, {
       ...options,
+      agent: upstreamAgent,
       headers: {
         'Authorization': `Bearer ${this.apiKey}`,
         'Content-Type': 'application/json',
         'User-Agent': 'SoundRights-Hackathon/1.0',
         ...options.headers,
       },
-    });
+    }));
 
     if (!response.ok) {
       const errorText = await response.text();
@@ -1,4 +1,6 @@
 import fetch from 'node-fetch';
+import { upstreamAgent } from './httpAgent';
+import { timeUpstream, upstreamOperation } from './metrics';
 
 export interface YakoaToken {
   id: string;
@@ -41,6 +43,15 @@ export interface YakoaRegistrationResponse {
   message: string;
 }
 
+export type OriginalityResult = {
+  // 'pending' when Yakoa had not finished scanning after polling
+  status: 'complete' | 'pending';
+  isOriginal: boolean;
+  confidence: number;
+  yakoaTokenId: string;
+  infringements: any[];
+};
+
 export class YakoaService {
   private readonly apiKey: string;
   private readonly baseUrl = 'https://docs-demo.ip-api-sandbox.yakoa.io/docs-demo';
@@ -60,15 +71,16 @@ export class YakoaService {
     }
 
     const url = `${this.baseUrl}${endpoint}`;
-    const response = await fetch(url, {
+    const response = await timeUpstream('yakoa', upstreamOperation(endpoint), () => fetch(url, {
       ...options,
+      agent: upstreamAgent,
       headers: {
         'accept': 'application/json',
         'content-type': 'application/json',
         'X-API-KEY': this.apiKey,
         ...options.headers,
       },
-    });
+    }));
 
     if (!response.ok) {
       const errorText = await response.text();
@@ -161,14 +173,11 @@ export class YakoaService {
   }
 
   /**
-   * Check if content is original (no high-confidence infringements)
+   * Check if content is original (no high-confidence infringements).
+   * Not cached: every call registers a new Yakoa token for a new track, so
+   * no key would ever repeat.
    */
-  async checkOriginality(mediaUrl: string, metadata: any): Promise<{
-    isOriginal: boolean;
-    confidence: number;
-    yakoaTokenId: string;
-    infringements: any[];
-  }> {
+  async checkOriginality(mediaUrl: string, metadata: any): Promise<OriginalityResult> {
     const registrationData: YakoaRegistrationRequest = {
       media_url: mediaUrl,
       metadata: {
@@ -190,10 +199,32 @@ export class YakoaService {
       attempts++;
     }
 
+    return this.toOriginalityResult(token);
+  }
+
+  /**
+   * Re-read a token whose scan was still pending when it was registered
+   */
+  async refreshOriginality(tokenId: string): Promise<OriginalityResult> {
+    return this.toOriginalityResult(await this.getToken(tokenId));
+  }
+
+  private toOriginalityResult(token: YakoaToken): OriginalityResult {
+    if (token.status === 'pending') {
+      return {
+        status: 'pending',
+        isOriginal: false,
+        confidence: 0,
+        yakoaTokenId: token.id,
+        infringements: []
+      };
+    }
+
     const isOriginal = !token.infringements || token.infringements.high_confidence === 0;
     const confidence = isOriginal ? 1.0 : (1.0 - (token.infringements?.high_confidence || 0) / (token.infringements?.total || 1));
 
     return {
+      status: 'complete',
       isOriginal,
       confidence,
       yakoaTokenId: token.id,
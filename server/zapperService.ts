@@ -1,4 +1,5 @@
 import { blockchainService } from './blockchainService';
+import { timeUpstream, upstreamOperation } from './metrics';
 
 export interface ZapperToken {
   contract_address: string;
@@ -46,7 +47,7 @@ export class ZapperService {
       throw new Error('Zapper API key required for portfolio data. Please configure ZAPPER_API_KEY.');
     }
 
-    const response = await fetch(`${this.baseUrl}${endpoint}`, {
+    const response = await timeUpstream('zapper', upstreamOperation(endpoint), () => fetch(`${this.baseUrl}${endpoint}`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
@@ -54,7 +55,7 @@ export class ZapperService {
         ...options.headers,
       },
       body: JSON.stringify(options.body),
-    });
+    }));
 
     if (!response.ok) {
       throw new Error(`Zapper API error: ${response.status} ${response.statusText}`);
@@ -67,6 +67,8 @@ export const tracks = pgTable("tracks", {
   album: varchar("album"),
   genre: varchar("genre"),
   duration: integer("duration"), // in seconds
+  sampleRate: integer("sample_rate"),
+  bitrate: integer("bitrate"), // in kb/s
   bpm: integer("bpm"),
   key: varchar("key"),
   mood: varchar("mood"),
@@ -76,12 +78,14 @@ export const tracks = pgTable("tracks", {
   downloadUrl: varchar("download_url"),
   fileSize: integer("file_size"),
   fileFormat: varchar("file_format"),
+  fileHash: varchar("file_hash"),
   
   // Metadata and AI analysis
   aiDescription: text("ai_description"),
   aiKeywords: text("ai_keywords").array(),
   
   // Audio fingerprinting and recognition
+  fingerprint: varchar("fingerprint"),
   acoustIdId: varchar("acoust_id"),
   musicbrainzId: varchar("musicbrainz_id"),
   auddData: jsonb("audd_data"),
@@ -95,7 +99,11 @@ export const tracks = pgTable("tracks", {
   status: trackStatusEnum("status").default('uploaded'),
   createdAt: timestamp("created_at").defaultNow(),
   updatedAt: timestamp("updated_at").defaultNow(),
-});
+}, (table) => [
+  index("IDX_tracks_fingerprint").on(table.fingerprint),
+  index("IDX_tracks_user_file_hash").on(table.userId, table.fileHash),
+  index("IDX_tracks_user_created").on(table.userId, table.createdAt.desc().nullsLast(), table.id.desc()),
+]);
 
 // Licenses
 export const licenses = pgTable("licenses", {
@@ -114,7 +122,10 @@ export const licenses = pgTable("licenses", {
   transactionHash: varchar("transaction_hash"),
   createdAt: timestamp("created_at").defaultNow(),
   updatedAt: timestamp("updated_at").defaultNow(),
-});
+}, (table) => [
+  index("IDX_licenses_licensee_created").on(table.licenseeId, table.createdAt.desc().nullsLast(), table.id.desc()),
+  index("IDX_licenses_track").on(table.trackId),
+]);
 
 // API Keys for external services
 export const apiKeys = pgTable("api_keys", {